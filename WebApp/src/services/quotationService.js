@@ -471,82 +471,74 @@ export const refreshPrices = async (quotationId) => {
   return lines;
 };
 
+const XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet';
+
 /**
- * Export stock check Excel - returns file data for direct download
+ * Get the download filename from a Content-Disposition header,
+ * preferring the UTF-8 `filename*` form over the ASCII `filename` fallback
  */
-export const exportStockCheck = async (quotationId) => {
+const getDispositionFilename = (disposition, fallback) => {
+  if (!disposition) return fallback;
+  const encoded = disposition.match(/filename\*=UTF-8''([^;]+)/i);
+  if (encoded) {
+    try {
+      return decodeURIComponent(encoded[1]);
+    } catch (e) {
+      // Malformed encoding - fall through to the plain filename
+    }
+  }
+  const plain = disposition.match(/filename="([^"]+)"/i);
+  return plain ? plain[1] : fallback;
+};
+
+/**
+ * Request an Excel export as a raw file and trigger a browser download.
+ * The Accept header asks the API for the binary response, so the file needs
+ * no base64 decoding on the client.
+ */
+const downloadExport = async (quotationId, exportType, errorMessage) => {
   const response = await authenticatedFetch(
-    buildQuotationsUrl(`/${quotationId}/exports/stock-check`),
-    { method: 'POST' },
+    buildQuotationsUrl(`/${quotationId}/exports/${exportType}`),
+    { method: 'POST', headers: { Accept: XLSX_CONTENT_TYPE } },
     'quotation'
   );
 
   if (!response.ok) {
-    const error = await response.json().catch(() => ({ message: 'Failed to export stock check' }));
-    throw new Error(error.message || `Failed to export stock check: ${response.statusText}`);
+    const error = await response.json().catch(() => ({ message: errorMessage }));
+    throw new Error(error.message || `${errorMessage}: ${response.statusText}`);
   }
 
-  const data = await response.json();
-  
-  // Convert base64 to blob and trigger download
-  const byteCharacters = atob(data.data);
-  const byteNumbers = new Array(byteCharacters.length);
-  for (let i = 0; i < byteCharacters.length; i++) {
-    byteNumbers[i] = byteCharacters.charCodeAt(i);
-  }
-  const byteArray = new Uint8Array(byteNumbers);
-  const blob = new Blob([byteArray], { type: data.content_type });
+  const blob = await response.blob();
+  const filename = getDispositionFilename(
+    response.headers.get('Content-Disposition'),
+    `${exportType}.xlsx`
+  );
   
   // Create download link and trigger
   const url = window.URL.createObjectURL(blob);
   const link = document.createElement('a');
   link.href = url;
-  link.download = data.filename;
+  link.download = filename;
   document.body.appendChild(link);
   link.click();
   document.body.removeChild(link);
   window.URL.revokeObjectURL(url);
   
-  return { filename: data.filename, success: true };
+  return { filename, success: true };
+};
+
+/**
+ * Export stock check Excel - returns file data for direct download
+ */
+export const exportStockCheck = async (quotationId) => {
+  return downloadExport(quotationId, 'stock-check', 'Failed to export stock check');
 };
 
 /**
  * Export priority import Excel - returns file data for direct download
  */
 export const exportPriorityImport = async (quotationId) => {
-  const response = await authenticatedFetch(
-    buildQuotationsUrl(`/${quotationId}/exports/priority-import`),
-    { method: 'POST' },
-    'quotation'
-  );
-
-  if (!response.ok) {
-    const error = await response.json().catch(() => ({ message: 'Failed to export priority import' }));
-    throw new Error(error.message || `Failed to export priority import: ${response.statusText}`);
-  }
-
-  const data = await response.json();
-  
-  // Convert base64 to blob and trigger download
-  const byteCharacters = atob(data.data);
-  const byteNumbers = new Array(byteCharacters.length);
-  for (let i = 0; i < byteCharacters.length; i++) {
-    byteNumbers[i] = byteCharacters.charCodeAt(i);
-  }
-  const byteArray = new Uint8Array(byteNumbers);
-  const blob = new Blob([byteArray], { type: data.content_type });
-  
-  // Create download link and trigger
-  const url = window.URL.createObjectURL(blob);
-  const link = document.createElement('a');
-  link.href = url;
-  link.download = data.filename;
-  document.body.appendChild(link);
-  link.click();
-  document.body.removeChild(link);
-  window.URL.revokeObjectURL(url);
-  
-  return { filename: data.filename, success: true };
+  return downloadExport(quotationId, 'priority-import', 'Failed to export priority import');
 };
 
 /**
@@ -8,7 +8,7 @@ import json
 from typing import Dict, Any, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from .utils import create_response, get_search_service
+from .utils import create_response, get_search_service, json_loads
 from .rerank_openai import rerank_results
 
 # Configure logging
@@ -30,7 +30,7 @@ def get_request_body(event: Dict[str, Any]) -> Dict[str, Any]:
     
     if isinstance(body, str):
         try:
-            return json.loads(body)
+            return json_loads(body)
         except json.JSONDecodeError:
             return {}
     
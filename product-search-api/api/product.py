@@ -8,12 +8,13 @@ import os
 from typing import Dict, Any
 
 # Add parent and shared directories to path
-SERVICE_ROOT = os.path.dirname(os.path.dirname(__file__))
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPO_ROOT = os.path.abspath(os.path.join(SERVICE_ROOT, ".."))
 SHARED_DIR = os.path.abspath(os.path.join(REPO_ROOT, "shared"))
 
-for path in {SERVICE_ROOT, REPO_ROOT, SHARED_DIR}:
-    if path not in sys.path:
+# Fixed order, and only directories that exist in this deployment
+for path in (SERVICE_ROOT, REPO_ROOT, SHARED_DIR):
+    if path not in sys.path and os.path.isdir(path):
         sys.path.append(path)
 
 from shared.product_service import fetch_product, list_products_page
@@ -3,15 +3,21 @@ Qdrant search operations for the API.
 """
 
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 import re
 
 import json
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+for path in (
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..')),
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'shared')),
+):
+    if path not in sys.path and os.path.isdir(path):
+        sys.path.append(path)
 
 # Ensure Lambda layer site-packages (/opt/python) is on sys.path
 LAYER_SITE_DIR = "/opt/python"
@@ -27,12 +33,44 @@ from qdrant_client.http.models import (
 )
 
 from indexer.qdrant_client import QdrantManager
-from indexer.embedding_bedrock import get_embedding_generator  # Using Bedrock (no Docker needed!)
+from indexer.embedding_bedrock import embed_query, get_embedding_generator  # Using Bedrock (no Docker needed!)
+from indexer.transformers import AUTOCOMPLETE_PREFIX_MAX_LENGTH
 from shared.qdrant_types import ProductMetadata
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+
+# Code-like query (e.g. 6L-LD8-DDXX): only letters/digits/-_./ (so no spaces),
+# with at least one letter and one digit
+_CODE_LIKE_QUERY_RE = re.compile(r'(?=[\w\-./]*?[^\W\d_])(?=[\w\-./]*?\d)[\w\-./]+')
+
+
+def is_code_like_query(query: str) -> bool:
+    """
+    Heuristic: treat the query as an ordering number (code-like) if it has no
+    spaces, contains both letters and digits, and only simple punctuation.
+    One compiled fullmatch replaces four per-character any()/all() scans.
+    
+    Args:
+        query: Search query (surrounding whitespace is ignored)
+        
+    Returns:
+        True if the query looks like an ordering number
+    """
+    return _CODE_LIKE_QUERY_RE.fullmatch(query.strip()) is not None
+
+
+@lru_cache(maxsize=256)
+def _word_boundary_prefix_re(prefix: str) -> "re.Pattern[str]":
+    """
+    Compiled pattern for prefix at a word boundary (start of string or after a
+    non-alphanumeric character). Cached so one autocomplete request compiles it
+    once rather than twice per candidate.
+    """
+    return re.compile(r'(^|[^a-z0-9])' + re.escape(prefix), re.IGNORECASE)
+
+
 class SearchService:
     """
     High-level search service using Qdrant.
@@ -42,6 +80,8 @@ class SearchService:
         """Initialize search service."""
         self.qdrant = QdrantManager()
         self.embedder = get_embedding_generator()
+        # Pay the Bedrock connection setup cost at init instead of on the first query
+        self.embedder.warmup()
     
     def vector_search(
         self,
@@ -74,9 +114,7 @@ class SearchService:
             return []
         
         try:
-            # Generate query embedding for vector search
             logger.info(f"Searching for: '{query}' (category: {category}, text_query: {text_query})")
-            query_vector = self.embedder.generate(query)
             
             # Decide how to use text filters:
             # - If caller explicitly provided text_query, use it as-is.
@@ -88,16 +126,34 @@ class SearchService:
             if text_query is not None:
                 hybrid_text_query = text_query
             else:
-                q = query.strip()
-                # Heuristic: treat as code-like if there are no spaces, it contains
-                # both letters and digits, and only simple punctuation characters.
-                has_space = " " in q
-                has_letter = any(c.isalpha() for c in q)
-                has_digit = any(c.isdigit() for c in q)
-                allowed_chars = all(c.isalnum() or c in "-_./" for c in q)
-                is_code_like = (not has_space) and has_letter and has_digit and allowed_chars
-
-                hybrid_text_query = q if is_code_like else None
+                hybrid_text_query = query.strip() if is_code_like_query(query) else None
+            
+            # Generate query embedding for vector search. For hybrid queries the
+            # embedding runs in a worker thread while the text-only candidate
+            # lookup runs against Qdrant, so the two round-trips overlap.
+            text_point_ids: Optional[List[str]] = None
+            if hybrid_text_query:
+                executor = ThreadPoolExecutor(max_workers=1)
+                try:
+                    embedding_future = executor.submit(embed_query, query)
+                    try:
+                        text_point_ids = self.qdrant.text_match_point_ids(
+                            collection_name=self.qdrant.collection_name,
+                            text_query=hybrid_text_query,
+                            category_filter=category
+                        )
+                    except Exception as e:
+                        logger.warning(f"Text candidate lookup failed, using MatchText filter: {str(e)}")
+                    
+                    # Nothing can match the text filter: skip waiting for the embedding
+                    if text_point_ids is not None and not text_point_ids:
+                        logger.info(f"No text matches for hybrid query '{query}'")
+                        return []
+                    query_vector = embedding_future.result()
+                finally:
+                    executor.shutdown(wait=False)
+            else:
+                query_vector = embed_query(query)
             
             # Search Qdrant using query_points with proper filtering and hybrid search
             results = self.qdrant.query_points(
@@ -106,28 +162,29 @@ class SearchService:
                 limit=limit,
                 category_filter=category,
                 text_query=hybrid_text_query,  # Enable hybrid search only for code-like queries
-                score_threshold=min_score if min_score > 0 else None
+                score_threshold=min_score if min_score > 0 else None,
+                point_ids=text_point_ids
             )
             
             logger.info(f"Results: {json.dumps(results, indent=2)}")
-            # Format results for API response
-            formatted_results: List[Dict[str, Any]] = []
-            for result in results:
-                metadata: ProductMetadata = result.get('metadata', {})  # type: ignore[assignment]
-                score = result.get('score', 0.0)
-                ordering_number = metadata.get('orderingNumber', '') or result.get('id', '')
-                category_val = metadata.get('productCategory') or metadata.get('category', '')
-                search_text = metadata.get('searchText') or metadata.get('category', '')
-                
-                relevance = self._calculate_relevance(score) if score else RelevanceLevel.LOW
-
-                formatted_results.append({
-                    'orderingNumber': ordering_number,
-                    'category': category_val,
+            # Format results for API response (thresholds resolved once per query)
+            high_threshold, medium_threshold = self._relevance_thresholds()
+            high, medium, low = RelevanceLevel.HIGH.value, RelevanceLevel.MEDIUM.value, RelevanceLevel.LOW.value
+            formatted_results: List[Dict[str, Any]] = [
+                {
+                    'orderingNumber': metadata.get('orderingNumber', '') or result.get('id', ''),
+                    'category': metadata.get('productCategory') or metadata.get('category', ''),
                     'score': round(score, 4) if score else 0.0,
-                    'relevance': relevance.value,
-                    'searchText': search_text
-                })
+                    'relevance': (
+                        high if score and score >= high_threshold
+                        else medium if score and score >= medium_threshold
+                        else low
+                    ),
+                    'searchText': metadata.get('searchText') or metadata.get('category', ''),
+                }
+                for result in results
+                for metadata, score in ((result.get('metadata', {}), result.get('score', 0.0)),)
+            ]
             
             logger.info(f"Found {len(formatted_results)} results")
             return formatted_results
@@ -258,6 +315,14 @@ class SearchService:
         try:
             logger.info(f"Autocomplete (text-only) for: '{prefix}'")
             
+            # Fast path: exact lookup on the index-time `prefixes` payload field.
+            # Only used when it fills the page; otherwise fall back to the
+            # scoring path below (also covers points indexed before `prefixes`).
+            fast_suggestions = self._autocomplete_from_prefix_index(prefix, limit, category)
+            if fast_suggestions is not None and len(fast_suggestions) >= limit:
+                logger.info(f"Returning {len(fast_suggestions)} autocomplete suggestions (prefix index)")
+                return fast_suggestions
+            
             # Use text-only search via Qdrant's query_points with MatchText filters
             # No vector embedding needed - much faster!
             # Fetch more candidates to account for potential tokenization mismatches
@@ -530,6 +595,73 @@ class SearchService:
             logger.error(f"Autocomplete error: {str(e)}", exc_info=True)
             return []
     
+    def _autocomplete_from_prefix_index(
+        self,
+        prefix: str,
+        limit: int,
+        category: Optional[str] = None
+    ) -> Optional[List[Dict[str, str]]]:
+        """
+        Look up autocomplete suggestions via the KEYWORD-indexed `prefixes` payload.
+        
+        Every candidate returned is an orderingNumber prefix match, so no
+        client-side scoring is needed beyond moving exact matches first.
+        
+        Args:
+            prefix: Query prefix
+            limit: Number of suggestions
+            category: Optional category filter
+            
+        Returns:
+            List of suggestions, or None if the prefix is not eligible or the lookup failed
+        """
+        prefix_clean = prefix.strip()
+        prefix_lower = prefix_clean.lower()
+        if not prefix_lower or len(prefix_lower) > AUTOCOMPLETE_PREFIX_MAX_LENGTH:
+            return None
+        
+        must_conditions = [
+            HttpFieldCondition(key="prefixes", match=HttpMatchValue(value=prefix_lower))
+        ]
+        if category:
+            must_conditions.append(
+                HttpFieldCondition(key="productCategory", match=HttpMatchValue(value=category))
+            )
+        
+        try:
+            points, _ = self.qdrant.client.scroll(
+                collection_name=self.qdrant.collection_name,
+                scroll_filter=HttpFilter(must=must_conditions),
+                limit=max(limit * 3, 30),
+                with_payload=True,
+                with_vectors=False
+            )
+        except Exception as e:
+            logger.warning(f"Prefix index lookup failed: {str(e)}")
+            return None
+        
+        exact: List[Dict[str, str]] = []
+        exact_ci: List[Dict[str, str]] = []
+        others: List[Dict[str, str]] = []
+        for point in points:
+            metadata: ProductMetadata = point.payload or {}  # type: ignore[assignment]
+            ordering_num = str(metadata.get('orderingNumber') or '').strip()
+            if not ordering_num:
+                continue
+            suggestion = {
+                'orderingNumber': ordering_num,
+                'category': metadata.get('productCategory') or metadata.get('category') or '',
+                'searchText': metadata.get('searchText') or metadata.get('description') or ''
+            }
+            if ordering_num == prefix_clean:
+                exact.append(suggestion)
+            elif ordering_num.lower() == prefix_lower:
+                exact_ci.append(suggestion)
+            else:
+                others.append(suggestion)
+        
+        return (exact + exact_ci + others)[:limit]
+    
     def _calculate_prefix_match_score(
         self,
         prefix: str,
@@ -585,16 +717,15 @@ class SearchService:
         
         # Priority 5: Prefix starts at word boundary in orderingNumber
         # Word boundary: start of string or after non-alphanumeric character
+        word_boundary_re = _word_boundary_prefix_re(prefix)
         if ordering_num:
             # Check if prefix appears at word boundary
-            word_boundary_pattern = r'(^|[^a-z0-9])' + re.escape(prefix)
-            if re.search(word_boundary_pattern, ordering_num, re.IGNORECASE):
+            if word_boundary_re.search(ordering_num):
                 return 60.0
         
         # Priority 6: Prefix starts at word boundary in searchText
         if search_text:
-            word_boundary_pattern = r'(^|[^a-z0-9])' + re.escape(prefix)
-            if re.search(word_boundary_pattern, search_text, re.IGNORECASE):
+            if word_boundary_re.search(search_text):
                 return 40.0
         
         # Priority 7: Prefix appears anywhere in orderingNumber
@@ -610,22 +741,16 @@ class SearchService:
 
 
     @staticmethod
-    def _calculate_relevance(score: float) -> "RelevanceLevel":
+    def _relevance_thresholds() -> Tuple[float, float]:
         """
-        Convert similarity score to relevance label.
-        
-        Cosine similarity ranges from -1 to 1, but we normalize to 0-1.
-        Good matches are typically > 0.7.
+        Read and validate the relevance thresholds.
         
         Thresholds are configurable via environment variables:
         - RELEVANCE_HIGH_THRESHOLD (default: 0.70)
         - RELEVANCE_MEDIUM_THRESHOLD (default: 0.50)
         
-        Args:
-            score: Similarity score
-            
         Returns:
-            Relevance label
+            Tuple of (high_threshold, medium_threshold)
         """
         # Get configurable thresholds from environment variables
         high_threshold = float(os.getenv('RELEVANCE_HIGH_THRESHOLD', '0.70'))
@@ -640,6 +765,24 @@ class SearchService:
             high_threshold = 0.70
             medium_threshold = 0.50
         
+        return high_threshold, medium_threshold
+
+    @classmethod
+    def _calculate_relevance(cls, score: float) -> "RelevanceLevel":
+        """
+        Convert similarity score to relevance label.
+        
+        Cosine similarity ranges from -1 to 1, but we normalize to 0-1.
+        Good matches are typically > 0.7.
+        
+        Args:
+            score: Similarity score
+            
+        Returns:
+            Relevance label
+        """
+        high_threshold, medium_threshold = cls._relevance_thresholds()
+        
         if score >= high_threshold:
             return RelevanceLevel.HIGH
         elif score >= medium_threshold:
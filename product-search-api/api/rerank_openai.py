@@ -2,12 +2,22 @@
 LLM-based re-ranking service for search results using OpenAI.
 """
 
+import bisect
+import hashlib
+import heapq
 import json
 import logging
 import os
 import re
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
 
 # Ensure both service root and repo root (for shared utils) are on sys.path.
 # This is needed so that `utils.openaiClient` (located at the repo root) can be imported
@@ -17,22 +27,250 @@ SERVICE_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))  # e.g., product
 REPO_ROOT = os.path.abspath(os.path.join(SERVICE_ROOT, ".."))
 
 # Add paths to sys.path - in Lambda, SERVICE_ROOT will be /var/task where utils/ lives
-for path in (SERVICE_ROOT, REPO_ROOT):
-    if path not in sys.path:
-        sys.path.insert(0, path)  # Insert at beginning for priority
+sys.path[:0] = [path for path in (SERVICE_ROOT, REPO_ROOT) if path not in sys.path]  # Prepend for priority
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv("LOG_LEVEL", "INFO"))
 
+# Prefer orjson (C extension) for building prompt payloads; fall back to json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any) -> str:
+    """
+    Serialize obj to compact JSON with non-ASCII kept as-is.
+
+    Keys keep their insertion order; every prompt payload is built with string
+    keys in a fixed order, so the output is already deterministic without the
+    cost of sorting each dict.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+# Rerank response cache.
+# Keyed on a fingerprint of (model, top_k, candidate set); each fingerprint holds
+# a few entries of (normalized query, query embedding, ranking). A cached ranking
+# is reused only for the same candidate set, either for the same normalized query
+# or for a query whose embedding is at least RERANK_CACHE_SIMILARITY similar.
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "512"))
+RERANK_CACHE_SIMILARITY = float(os.getenv("RERANK_CACHE_SIMILARITY", "0.92"))
+RERANK_SEMANTIC_CACHE = os.getenv("RERANK_SEMANTIC_CACHE", "true").lower() not in {"false", "0", "no"}
+# Cached rankings expire after this many seconds (0 keeps them until evicted)
+RERANK_CACHE_TTL_SECONDS = int(os.getenv("RERANK_CACHE_TTL_SECONDS", "600"))
+# Optional DynamoDB table shared by all containers for exact-query hits (empty disables)
+RERANK_CACHE_TABLE = os.getenv("RERANK_CACHE_TABLE", "")
+_RERANK_CACHE_ENTRIES_PER_SET = 8
+
+# Candidate lists longer than RERANK_SHARD_THRESHOLD are split into shards of
+# RERANK_SHARD_SIZE that are ranked by parallel LLM calls and merged by relevancy
+# score (a threshold of 0 disables sharding)
+RERANK_SHARD_THRESHOLD = int(os.getenv("RERANK_SHARD_THRESHOLD", "30"))
+RERANK_SHARD_SIZE = max(1, int(os.getenv("RERANK_SHARD_SIZE", "20")))
+RERANK_SHARD_WORKERS = max(1, int(os.getenv("RERANK_SHARD_WORKERS", "8")))
+
+# When the caller asks for every candidate (no truncation), optionally skip the
+# LLM and return the candidates ordered by their retrieval score
+RERANK_SKIP_WHEN_COMPLETE = os.getenv("RERANK_SKIP_WHEN_COMPLETE", "false").lower() in {"true", "1", "yes"}
+
+# Open the OpenAI connection at import so the first rerank skips the TCP/TLS handshake
+RERANK_PREWARM = os.getenv("RERANK_PREWARM", "false").lower() in {"true", "1", "yes"}
+# Idle keep-alive connections to OpenAI are kept this long (httpx default is 5s)
+_OPENAI_KEEPALIVE_EXPIRY = 300.0
+
+# Stream the rerank response and stop reading once top_k usable entries arrived
+RERANK_STREAM = os.getenv("RERANK_STREAM", "true").lower() not in {"false", "0", "no"}
+
+_rerank_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+_rerank_cache_lock = threading.Lock()
+_rerank_cache_table = None
+
+# Specification parsing patterns (compiled once at import)
+_SPECS_RE = re.compile(r'Specifications:\s*(.+?)(?:\s*\||$)', re.IGNORECASE)
+# One "key: value" pair per match, in a single finditer sweep. Pairs are
+# separated by a comma followed by a letter (so "1,000" stays in one value);
+# segments without a colon match the trailing alternatives and are skipped.
+# _SPEC_INNER_COMMA is a comma that does not start a new pair.
+_SPEC_INNER_COMMA = r',(?!\s*[A-Za-z])'
+_SPEC_PAIR_RE = re.compile(
+    rf'(?P<key>[^:,]*+(?:{_SPEC_INNER_COMMA}[^:,]*+)*+):(?P<value>[^,]*+(?:{_SPEC_INNER_COMMA}[^,]*+)*+)'
+    rf'|[^,]++(?:{_SPEC_INNER_COMMA}[^,]*+)*+'
+    rf'|(?:{_SPEC_INNER_COMMA}[^,]*+)++'
+)
+
+# Common specification patterns in natural-language queries, fused into one
+# alternation with a named group per spec so the query is scanned once
+_SPEC_PATTERNS = {
+    # Fractions and mixed numbers (1/2, 1-1/2, 1 1/2) are kept whole so that
+    # 1/2" and 3/4" stay distinct; `"` needs no word boundary after it
+    'Size': r'((?:\d+[\s-]+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)\s*(?:(?:inch|in|mm|cm|m)\b|"))',
+    'Pressure': r'(\d+(?:\.\d+)?\s*(?:psi|bar|pa|kpa|mpa))\b',
+    'Material': r'\b(SS\d+|stainless\s+steel|aluminum|brass|copper|plastic|nylon|ptfe|pvc)\b',
+    'Temperature': r'(\d+(?:\.\d+)?\s*(?:°?[CF]|celsius|fahrenheit))\b',
+    'Thread': r'(NPT|BSP|metric|thread)\b',
+}
+_SPEC_RE = re.compile(
+    "|".join(f"(?P<{key}>{pattern})" for key, pattern in _SPEC_PATTERNS.items()),
+    re.IGNORECASE,
+)
+
+# searchText is truncated to this many characters in the LLM payload; the
+# parsed specifications are sent separately, so the tail is rarely needed
+_PROMPT_SEARCH_TEXT_CHARS = 300
+
+# Relevance labels by reranked score: [0, 0.50) low, [0.50, 0.70) medium, [0.70, ...] high
+_RELEVANCE_THRESHOLDS = (0.50, 0.70)
+_RELEVANCE_LABELS = ('low', 'medium', 'high')
+
+# Fixed sampling seed so identical rerank prompts get reproducible answers
+_RERANK_SEED = 42
+
+# Ordering number: 1-50 chars of letters/digits/-_./, at least one letter and one digit
+_ORDERING_NUMBER_RE = re.compile(r'(?=[\w\-./]*?[^\W\d_])(?=[\w\-./]*?\d)[\w\-./]{1,50}')
+
+# System prompts for the two query types (static, built once at import).
+# Both start with the same shared block (legend, output format, general rules)
+# so OpenAI's prompt cache can reuse that prefix across query types; only the
+# type-specific instructions at the end differ.
+_SYSTEM_PROMPT_SHARED = (
+    "You are a retrieval re-ranking engine that optimizes search results for relevance.\n\n"
+    "Each candidate has the fields: `i` (index), `o` (orderingNumber), `c` (category), `t` (searchText, may be truncated), `s` (product specifications, when available; they are then omitted from `t`).\n"
+    "Candidates are listed in their original retrieval order, best vector match first.\n\n"
+    "Output format:\n"
+    "- You MUST respond with valid JSON only, no extra text.\n"
+    "- The JSON must have the shape:\n"
+    '  {\"ranking\": [{\"i\": i1, \"score\": 0.95}, {\"i\": i2, \"score\": 0.85}, ...]}\n'
+    "- Each `i` must be a unique integer that exists in the input indices.\n"
+    "- Each `score` is the item's relevancy score (0.0-1.0).\n"
+    "- Return them in the desired order from most relevant to least relevant.\n\n"
+    "General rules:\n"
+    "- NEVER invent or fabricate new items.\n"
+    "- ONLY reference candidates by their provided index `i`.\n"
+    "- Select the single best set of top results strictly from the provided list.\n\n"
+)
+
+# Structured-output schema for the rerank response. With strict mode the API
+# guarantees this shape, so only index range and duplicates need checking.
+_RERANK_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "rerank",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "ranking": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "i": {"type": "integer"},
+                            "score": {"type": "number"},
+                        },
+                        "required": ["i", "score"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["ranking"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+# One complete {"i": ..., "score": ...} entry of the streamed ranking (strict
+# structured output emits keys in schema order)
+_RANKING_ENTRY_RE = re.compile(
+    r'\{\s*"i"\s*:\s*(-?\d+)\s*,\s*"score"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*\}'
+)
+
+_SYSTEM_PROMPT_ORDERING_NUMBER = _SYSTEM_PROMPT_SHARED + (
+    "Given a user query that appears to be an ORDERING NUMBER (product code/identifier) and a list of candidate results, your job is to:\n"
+    "1. Carefully read the query and each candidate's fields.\n"
+    "2. Judge how relevant each candidate is to the query, prioritizing:\n"
+    "   - EXACT MATCH on orderingNumber (highest priority).\n"
+    "   - Case-insensitive exact match on orderingNumber.\n"
+    "   - Prefix match on orderingNumber (query starts with or contains the orderingNumber).\n"
+    "   - Category alignment when relevant.\n"
+    "   - The original retrieval order as a soft signal only.\n\n"
+    "Important rules:\n"
+    "- Prioritize exact orderingNumber matches above all else.\n"
+    "- Do not perform any fuzzy creative interpretation; be precise and conservative.\n"
+    "- Relevancy scores should reflect how well each result matches the query (1.0 = perfect match, 0.0 = poor match).\n"
+)
+
+_SYSTEM_PROMPT_DESCRIPTION = _SYSTEM_PROMPT_SHARED + (
+    "Given a user query that appears to be a PRODUCT DESCRIPTION (natural language) and a list of candidate results, your job is to:\n"
+    "1. Carefully read the query and each candidate's fields.\n"
+    "2. Extract any technical specifications from the query (e.g., size, pressure, material, temperature, thread type).\n"
+    "   Treat NUMERIC SPECIFICATIONS (especially sizes and pressures) as VERY IMPORTANT SIGNALS, but do not fully disqualify other items.\n"
+    "3. Judge how relevant each candidate is to the query, prioritizing:\n"
+    "   - TECHNICAL SPECIFICATIONS MATCH (HIGHEST PRIORITY SIGNAL):\n"
+    "     * Compare specifications from the query with product specifications.\n"
+    "     * Products whose size/pressure/material clearly MATCH the query should be ranked at the top with high relevancy scores.\n"
+    "     * Products whose size/pressure/material clearly DO NOT match the query requirements should receive much lower relevancy scores and appear below matching items, but may still appear in the list if there are few or no exact matches.\n"
+    "     * When the query includes an explicit size (e.g. '1/4 inch', '3/8\"', '1 inch'), items with that SAME size should be ranked above items with different sizes.\n"
+    "     * Do NOT rank items with different sizes (e.g. '1/4', '3/8', '1/2', '1\"') above exact size matches, unless the query clearly allows a range or alternatives.\n"
+    "   - Semantic match between the query description and searchText.\n"
+    "   - Category alignment when relevant.\n"
+    "   - The original retrieval order as a soft signal only.\n"
+    "4. CRITICAL: Strongly down-rank products with specifications that are clearly incompatible with the query (give them noticeably lower relevancy scores), rather than completely rejecting them.\n"
+    "   For example:\n"
+    "   - If the query asks for '1/2 inch' but a product has '3/4 inch' or '1/4 inch', those products should be ranked significantly lower than any '1/2 inch' products, with clearly lower relevancy scores.\n"
+    "   - If the query asks for '1/4 inch' NPT, then '1/4' NPT products should be ranked above '3/8', '1/2', or '1 inch' products, and given higher relevancy scores.\n"
+    "   - If the query asks for '1000psi' but a product has '500psi', it should be ranked lower unless the query explicitly allows lower pressure ratings.\n"
+    "5. When some products are missing a specification that is clearly required by the query (for example, no size is specified on the product but the query includes a size), rank them BELOW products with explicit, matching specifications, but they may still appear with moderate or low relevancy scores.\n\n"
+    "Important rules:\n"
+    "- SPECIFICATIONS ARE CRITICAL: Products with incompatible specifications must be ranked much lower and should not appear above exact or clearly compatible matches, but they can still appear as lower-ranked options.\n"
+    "- If several items are similarly relevant, prefer those with clearer, more specific searchText and matching specifications.\n"
+    "- Do not perform any fuzzy creative interpretation; be precise and conservative when comparing numeric values like sizes and pressures.\n"
+    "- Relevancy scores should reflect how well each result matches the query, with special attention to specification compatibility, especially exact numeric matches for size and pressure.\n"
+)
+
+
+# OpenAI client reused across warm invocations so its HTTP connection pool
+# (and TLS sessions) survive between reranks
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
 
 def _get_openai_client():
     """
-    Lazily construct an OpenAI client.
+    Lazily construct the module-level OpenAI client (once per container).
     """
+    global _openai_client
+    if _openai_client is not None:
+        return _openai_client
+
     # Lazy import to ensure path setup happens first
     try:
+        import httpx
         from utils.openaiClient import OpenAIClient
-        return OpenAIClient()
+        with _openai_client_lock:
+            if _openai_client is None:
+                # HTTP/2 multiplexes parallel shard calls over one TLS connection;
+                # it needs the h2 package (pulled in by qdrant-client's httpx[http2])
+                try:
+                    import h2  # noqa: F401
+                    http2 = True
+                except ImportError:
+                    http2 = False
+                # Keep enough idle connections for parallel rerank shards, for longer
+                # than httpx's 5s default so warm invocations reuse them
+                http_client = httpx.Client(
+                    http2=http2,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=RERANK_SHARD_WORKERS,
+                        keepalive_expiry=_OPENAI_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=5.0),
+                )
+                _openai_client = OpenAIClient(http_client=http_client)
+        return _openai_client
     except ImportError as e:
         # Log detailed error information for debugging
         logger.error(
@@ -72,22 +310,9 @@ def _is_ordering_number_query(query: str) -> bool:
     if not query:
         return False
     
-    q = query.strip()
-    has_space = " " in q
-    has_letter = any(c.isalpha() for c in q)
-    has_digit = any(c.isdigit() for c in q)
-    allowed_chars = all(c.isalnum() or c in "-_./" for c in q)
-    
-    # Ordering number: no spaces, has both letters and digits, uses allowed chars, relatively short
-    is_ordering_number_like = (
-        (not has_space or len(q.split()) <= 2) and  # Allow 1-2 words max
-        has_letter and 
-        has_digit and 
-        allowed_chars and
-        len(q) <= 50  # Ordering numbers are typically short
-    )
-    
-    return is_ordering_number_like
+    # Single C-level scan: allowed chars only (so no spaces), has both a letter
+    # and a digit, and relatively short
+    return _ORDERING_NUMBER_RE.fullmatch(query.strip()) is not None
 
 
 def _extract_specifications(text: str) -> Dict[str, str]:
@@ -103,29 +328,56 @@ def _extract_specifications(text: str) -> Dict[str, str]:
     Returns:
         Dictionary mapping spec keys to values
     """
-    specs = {}
-    
     if not text:
-        return specs
+        return {}
+    
+    return dict(_extract_specifications_cached(text))
+
+
+@lru_cache(maxsize=4096)
+def _extract_specifications_cached(text: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Parse specifications from text, memoized per text.
+    
+    The same products (and so the same searchText strings) recur across
+    queries, so the regex work is done once per distinct text. Returns an
+    immutable tuple of (key, value) pairs so cached values cannot be mutated.
+    """
+    specs: Dict[str, str] = {}
     
     # Look for "Specifications:" pattern
-    specs_match = re.search(r'Specifications:\s*(.+?)(?:\s*\||$)', text, re.IGNORECASE)
+    specs_match = _SPECS_RE.search(text)
     if specs_match:
         specs_text = specs_match.group(1)
         
-        # Parse key-value pairs separated by commas
+        # Parse key-value pairs separated by commas in a single scan
         # Handle both "key: value" and "key:value" formats
-        pairs = re.split(r',\s*(?=[A-Za-z])', specs_text)
-        for pair in pairs:
-            # Match "key: value" pattern
-            match = re.match(r'([^:]+?):\s*(.+)', pair.strip())
-            if match:
-                key = match.group(1).strip()
-                value = match.group(2).strip()
-                if key and value:
-                    specs[key] = value
+        for match in _SPEC_PAIR_RE.finditer(specs_text):
+            key = match.group('key')
+            if key is None:
+                continue
+            key = key.strip()
+            value = match.group('value').strip()
+            if key and value:
+                specs[key] = value
     
-    return specs
+    return tuple(specs.items())
+
+
+@lru_cache(maxsize=4096)
+def _strip_specifications(text: str) -> str:
+    """
+    Remove the "Specifications: ..." segment from a searchText.
+    
+    Used once the specs have been parsed into their own prompt field, so the
+    LLM does not read them twice and the searchText budget goes to the rest.
+    """
+    specs_match = _SPECS_RE.search(text)
+    if not specs_match:
+        return text
+    head = text[:specs_match.start()].rstrip(" |")
+    tail = text[specs_match.end():].lstrip(" |")
+    return f"{head} | {tail}" if head and tail else head or tail
 
 
 def _extract_specs_from_query(query: str) -> Dict[str, str]:
@@ -146,28 +398,549 @@ def _extract_specs_from_query(query: str) -> Dict[str, str]:
     if not query:
         return specs
     
-    # Common specification patterns
-    patterns = {
-        'Size': r'(\d+(?:\.\d+)?\s*(?:inch|in|"|mm|cm|m))\b',
-        'Pressure': r'(\d+(?:\.\d+)?\s*(?:psi|bar|pa|kpa|mpa))\b',
-        'Material': r'\b(SS\d+|stainless\s+steel|aluminum|brass|copper|plastic|nylon|ptfe|pvc)\b',
-        'Temperature': r'(\d+(?:\.\d+)?\s*(?:°?[CF]|celsius|fahrenheit))\b',
-        'Thread': r'(NPT|BSP|metric|thread)\b',
-    }
+    found: Dict[str, List[str]] = {}
+    for match in _SPEC_RE.finditer(query):
+        found.setdefault(match.lastgroup, []).append(match.group(match.lastgroup))
     
-    for spec_key, pattern in patterns.items():
-        matches = re.findall(pattern, query, re.IGNORECASE)
+    # Keep pattern order; take the first match or combine multiple
+    for spec_key in _SPEC_PATTERNS:
+        matches = found.get(spec_key)
         if matches:
-            # Take the first match or combine multiple
             specs[spec_key] = matches[0] if len(matches) == 1 else ', '.join(matches)
     
     return specs
 
 
+def _normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace for exact cache matching."""
+    return " ".join(query.lower().split())
+
+
+def _candidate_fingerprint(
+    results: List[Dict[str, Any]],
+    top_k: int,
+    model: str,
+    query_specs: Dict[str, str],
+) -> str:
+    """
+    Fingerprint the rerank inputs other than the query text.
+    
+    Order-independent over the candidates, so the same candidate set retrieved
+    in a different order maps to the same cache slot. The specs extracted from
+    the query are part of the fingerprint: "ball valve 1/2 inch" and
+    "ball valve 3/4 inch" embed almost identically and often retrieve the same
+    candidates, but must not share a ranking (the rerank pushes down items
+    whose size or pressure does not match).
+    """
+    candidates = sorted(
+        f"{item.get('orderingNumber') or ''}\x1f{item.get('searchText') or ''}"
+        for item in results
+    )
+    specs = sorted(f"{key}\x1f{_normalize_query(value)}" for key, value in query_specs.items())
+    payload = "\x1e".join([model, str(top_k), *candidates, "\x1d", *specs])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _embed_query(query: str) -> Optional[np.ndarray]:
+    """
+    Embed the query for the semantic cache tier; None if unavailable.
+
+    Uses the memoized query embedding, so the vector computed by the search
+    that produced these results is reused rather than fetched again.
+    """
+    try:
+        from indexer.embedding_bedrock import embed_query_array
+        return embed_query_array(query)
+    except Exception as e:
+        logger.warning(f"Could not embed query for rerank cache: {str(e)}")
+        return None
+
+
+def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity of two equal-length vectors (0.0 if either is zero)."""
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / norm if norm else 0.0
+
+
+def _ranking_to_indices(
+    ranking: List[Tuple[str, Any]],
+    results: List[Dict[str, Any]],
+) -> Optional[Tuple[List[int], Dict[int, float]]]:
+    """Map a cached (orderingNumber, relevancy) ranking onto indices of `results`."""
+    positions: Dict[str, int] = {}
+    for idx, item in enumerate(results):
+        positions.setdefault(item.get("orderingNumber") or "", idx)
+
+    valid_indices: List[int] = []
+    relevancy_scores: Dict[int, float] = {}
+    for ordering_number, relevancy in ranking:
+        idx = positions.get(ordering_number)
+        if idx is None:
+            return None
+        valid_indices.append(idx)
+        if relevancy is not None:
+            try:
+                relevancy_scores[idx] = float(relevancy)
+            except (TypeError, ValueError):
+                pass
+    return valid_indices, relevancy_scores
+
+
+def _is_fresh(entry: Dict[str, Any], now: float) -> bool:
+    """True if a cache entry is still within RERANK_CACHE_TTL_SECONDS."""
+    return RERANK_CACHE_TTL_SECONDS <= 0 or now - entry["stored_at"] < RERANK_CACHE_TTL_SECONDS
+
+
+def _get_rerank_cache_table():
+    """Get or create the DynamoDB table handle for the shared rerank cache."""
+    global _rerank_cache_table
+
+    if _rerank_cache_table is None:
+        from indexer.embedding_bedrock import get_boto3_session
+        _rerank_cache_table = get_boto3_session().resource("dynamodb").Table(RERANK_CACHE_TABLE)
+
+    return _rerank_cache_table
+
+
+def _shared_cache_key(fingerprint: str, normalized_query: str) -> str:
+    """
+    DynamoDB key for one (candidate set, normalized query) pair.
+    
+    The fingerprint already covers the query specs (see _candidate_fingerprint),
+    so queries asking for different specs never share a key.
+    """
+    return hashlib.sha256(f"{fingerprint}\x1e{normalized_query}".encode("utf-8")).hexdigest()
+
+
+def _shared_cache_lookup(fingerprint: str, normalized_query: str) -> Optional[List[Tuple[str, Any]]]:
+    """Fetch a ranking from the shared DynamoDB cache; None on miss, expiry or error."""
+    if not RERANK_CACHE_TABLE:
+        return None
+
+    try:
+        item = _get_rerank_cache_table().get_item(
+            Key={"cacheKey": _shared_cache_key(fingerprint, normalized_query)}
+        ).get("Item")
+    except Exception as e:
+        logger.warning(f"Shared rerank cache lookup failed: {str(e)}")
+        return None
+
+    if not item:
+        return None
+    # DynamoDB TTL deletion is lazy, so check expiry here as well
+    if "expiresAt" in item and int(item["expiresAt"]) <= time.time():
+        return None
+
+    return [tuple(pair) for pair in json.loads(item["ranking"])]
+
+
+def _shared_cache_store(fingerprint: str, normalized_query: str, ranking: List[Tuple[str, Any]]) -> None:
+    """Write a ranking to the shared DynamoDB cache (best effort)."""
+    if not RERANK_CACHE_TABLE:
+        return
+
+    item = {
+        "cacheKey": _shared_cache_key(fingerprint, normalized_query),
+        # Stored as a JSON string so float scores need no Decimal conversion
+        "ranking": json.dumps(ranking),
+    }
+    if RERANK_CACHE_TTL_SECONDS > 0:
+        item["expiresAt"] = int(time.time()) + RERANK_CACHE_TTL_SECONDS
+
+    try:
+        _get_rerank_cache_table().put_item(Item=item)
+    except Exception as e:
+        logger.warning(f"Shared rerank cache store failed: {str(e)}")
+
+
+def _rerank_cache_insert(fingerprint: str, entry: Dict[str, Any]) -> None:
+    """Add an entry to the in-process LRU, dropping expired and surplus entries."""
+    if RERANK_CACHE_SIZE <= 0:
+        return
+
+    now = time.time()
+    with _rerank_cache_lock:
+        entries = _rerank_cache.setdefault(fingerprint, [])
+        entries[:] = [existing for existing in entries if _is_fresh(existing, now)]
+        entries.append(entry)
+        del entries[:-_RERANK_CACHE_ENTRIES_PER_SET]
+        _rerank_cache.move_to_end(fingerprint)
+        while len(_rerank_cache) > RERANK_CACHE_SIZE:
+            _rerank_cache.popitem(last=False)
+
+
+def _rerank_cache_lookup(
+    fingerprint: str,
+    query: str,
+    results: List[Dict[str, Any]],
+) -> Tuple[Optional[Tuple[List[int], Dict[int, float]]], Optional[np.ndarray]]:
+    """
+    Look up a cached ranking for this candidate set.
+    
+    Returns:
+        ((valid_indices, relevancy_scores) or None, query embedding if one was computed)
+    """
+    normalized = _normalize_query(query)
+    now = time.time()
+    with _rerank_cache_lock:
+        entries = [entry for entry in _rerank_cache.get(fingerprint) or [] if _is_fresh(entry, now)]
+        if entries:
+            _rerank_cache.move_to_end(fingerprint)
+
+    for entry in entries:
+        if entry["query"] == normalized:
+            return _ranking_to_indices(entry["ranking"], results), None
+
+    # Exact hit from another container; keep a local copy for next time
+    ranking = _shared_cache_lookup(fingerprint, normalized)
+    if ranking is not None:
+        logger.info(f"Rerank shared cache hit for query '{query}'")
+        _rerank_cache_insert(fingerprint, {"query": normalized, "vector": None, "ranking": ranking, "stored_at": now})
+        return _ranking_to_indices(ranking, results), None
+
+    if not entries:
+        return None, None
+
+    if not RERANK_SEMANTIC_CACHE or all(entry["vector"] is None for entry in entries):
+        return None, None
+
+    query_vector = _embed_query(query)
+    if query_vector is None or not query_vector.size:
+        return None, None
+
+    best_entry, best_similarity = None, RERANK_CACHE_SIMILARITY
+    for entry in entries:
+        if entry["vector"] is not None and len(entry["vector"]) == len(query_vector):
+            similarity = _cosine_similarity(query_vector, entry["vector"])
+            if similarity >= best_similarity:
+                best_entry, best_similarity = entry, similarity
+
+    if best_entry is None:
+        return None, query_vector
+
+    logger.info(f"Rerank semantic cache hit (similarity {best_similarity:.3f}) for query '{query}'")
+    return _ranking_to_indices(best_entry["ranking"], results), query_vector
+
+
+def _rerank_cache_store(
+    fingerprint: str,
+    query: str,
+    query_vector: Optional[np.ndarray],
+    results: List[Dict[str, Any]],
+    valid_indices: List[int],
+    relevancy_scores: Dict[int, float],
+) -> None:
+    """Store a ranking by orderingNumber so it survives candidate reordering."""
+    normalized = _normalize_query(query)
+    ranking = [
+        (
+            results[idx].get("orderingNumber") or "",
+            relevancy_scores.get(idx),
+        )
+        for idx in valid_indices
+    ]
+
+    _shared_cache_store(fingerprint, normalized, ranking)
+
+    if RERANK_CACHE_SIZE <= 0:
+        return
+
+    if query_vector is None and RERANK_SEMANTIC_CACHE:
+        query_vector = _embed_query(query)
+
+    _rerank_cache_insert(
+        fingerprint,
+        {"query": normalized, "vector": query_vector, "ranking": ranking, "stored_at": time.time()},
+    )
+
+
+def _apply_ranking(
+    results: List[Dict[str, Any]],
+    valid_indices: List[int],
+    relevancy_scores: Dict[int, float],
+) -> List[Dict[str, Any]]:
+    """
+    Build the re-ranked result list, overriding confidence scores with relevancy.
+    """
+    # Input dicts are never mutated: scored items get a new merged dict,
+    # unscored items are passed through by reference
+    re_ranked = []
+    for idx in valid_indices:
+        result = results[idx]
+        
+        # Override confidence score based on reranking relevancy
+        relevancy_score = relevancy_scores.get(idx)
+        if relevancy_score is not None:
+            # Convert relevancy score to confidence (0-100)
+            new_confidence = relevancy_score * 100
+            # Relevance label from the threshold table
+            relevance = _RELEVANCE_LABELS[bisect.bisect_right(_RELEVANCE_THRESHOLDS, relevancy_score)]
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Updated result {idx} confidence: {result.get('score', 'N/A')} -> {relevancy_score} (confidence: {new_confidence})")
+            # Update score, confidence and relevance fields in one dict construction
+            result = {
+                **result,
+                'score': relevancy_score,
+                'confidence': round(new_confidence),
+                'relevance': relevance,
+            }
+        
+        re_ranked.append(result)
+    
+    return re_ranked
+
+
+def _match_ordering_number(
+    query: str,
+    results: List[Dict[str, Any]],
+    top_k: int,
+) -> Optional[Tuple[List[int], Dict[int, float]]]:
+    """
+    Rank ordering-number queries deterministically when the answer is unambiguous.
+
+    Exact (case-insensitive) orderingNumber matches score 1.0 and prefix matches
+    score 0.8. A ranking is returned only when there is an exact match or enough
+    prefix matches to fill top_k; otherwise the LLM has to decide.
+
+    Returns:
+        (valid_indices, relevancy_scores), or None if the LLM is still needed.
+    """
+    q_low = query.strip().lower()
+    exact: List[int] = []
+    prefix: List[int] = []
+    for idx, item in enumerate(results):
+        ordering_number = (item.get("orderingNumber") or "").lower()
+        if ordering_number == q_low:
+            exact.append(idx)
+        elif ordering_number.startswith(q_low):
+            prefix.append(idx)
+
+    if not exact and len(prefix) < top_k:
+        return None
+
+    valid_indices = (exact + prefix)[:top_k]
+    relevancy_scores: Dict[int, float] = {idx: 1.0 for idx in exact}
+    relevancy_scores.update({idx: 0.8 for idx in prefix})
+    return valid_indices, relevancy_scores
+
+
+def _fill_to_top_k(
+    results: List[Dict[str, Any]],
+    valid_indices: List[int],
+    top_k: int,
+) -> None:
+    """
+    Fill valid_indices in place up to top_k with the highest-scoring remaining results.
+    """
+    if len(valid_indices) >= top_k:
+        return
+
+    seen = set(valid_indices)
+    needed = top_k - len(valid_indices)
+    # Highest original scores among the indices not already selected
+    filler = heapq.nlargest(
+        needed,
+        ((i, results[i].get('score', 0.0)) for i in range(len(results)) if i not in seen),
+        key=lambda x: x[1],
+    )
+    for i, _ in filler:
+        valid_indices.append(i)
+    logger.info(f"Filled {needed} additional slots from original ranking to reach top_k={top_k}")
+
+
+def _serialize_candidate(idx: int, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the compact prompt representation of one candidate."""
+    search_text = item.get("searchText", "") or ""
+    product_specs = _extract_specifications(search_text)
+    if product_specs:
+        # Specs go in their own field; don't repeat them in the text
+        search_text = _strip_specifications(search_text)
+    candidate = {
+        "i": idx,
+        "o": item.get("orderingNumber"),
+        "c": item.get("category"),
+        "t": search_text[:_PROMPT_SEARCH_TEXT_CHARS],
+    }
+    if product_specs:
+        candidate["s"] = product_specs  # Include specs if available
+    return candidate
+
+
+def _request_llm_ranking(
+    client: Any,
+    model: str,
+    query: str,
+    query_specs: Dict[str, str],
+    is_ordering_number: bool,
+    results: List[Dict[str, Any]],
+    top_k: int,
+) -> Tuple[List[int], Dict[int, float]]:
+    """
+    Ask the LLM to rank one list of candidates.
+
+    Returns:
+        (valid_indices, relevancy_scores) with indices local to `results`,
+        deduplicated and truncated to top_k (possibly empty).
+    """
+    # Serialize results with extracted specifications.
+    # Short keys and truncated searchText keep the prompt small; the legend
+    # is in the system prompt. Candidates stay in retrieval order.
+    serialized_results = [_serialize_candidate(idx, item) for idx, item in enumerate(results)]
+
+    # Log a small sample of serialized results for debugging (avoid huge payloads)
+    if serialized_results and logger.isEnabledFor(logging.INFO):
+        sample_for_log = serialized_results[:5]
+        logger.info(f"Serialized results sample for rerank: {sample_for_log}")
+
+    # Select system prompt based on query type
+    system_prompt = _SYSTEM_PROMPT_ORDERING_NUMBER if is_ordering_number else _SYSTEM_PROMPT_DESCRIPTION
+
+    # Build user prompt with query specifications if available
+    query_info = f"Query:\n{query}\n"
+    if query_specs:
+        query_info += f"\nExtracted specifications from query:\n{_dumps(query_specs)}\n"
+    
+    # Fixed instructions first, query and candidates last, so only the tail varies
+    user_prompt = (
+        "Re-rank the following search results for the given query. "
+        f"Return at most {top_k} items via their indices in the required JSON format, "
+        "along with relevancy scores for each item.\n\n"
+        f"{query_info}\n"
+        "Candidate results (JSON list):\n"
+        f"{_dumps(serialized_results)}"
+    )
+
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+    # The schema guarantees the types; drop out-of-range and repeated indices
+    # (dense small ints, so a bytearray flag per result)
+    num_results = len(results)
+    seen = bytearray(num_results)
+    valid_indices: List[int] = []
+    relevancy_scores: Dict[int, float] = {}
+    entries = _iter_ranking_entries(client, model, messages)
+    try:
+        for i, score in entries:
+            if 0 <= i < num_results and not seen[i]:
+                seen[i] = 1
+                valid_indices.append(i)
+                relevancy_scores[i] = score
+                if len(valid_indices) >= top_k:
+                    break
+    finally:
+        # Stops a streamed response early once top_k entries are in
+        entries.close()
+
+    return valid_indices, relevancy_scores
+
+
+def _iter_ranking_entries(
+    client: Any,
+    model: str,
+    messages: List[Dict[str, str]],
+) -> Iterator[Tuple[int, float]]:
+    """
+    Yield (index, relevancy) ranking entries from the LLM, best first.
+
+    With RERANK_STREAM each entry is yielded as soon as it is complete in the
+    streamed output, so closing the generator ends the request without waiting
+    for (or paying for) the rest of the response.
+    """
+    if not RERANK_STREAM:
+        response_json = client.chat_completion_json(
+            messages=messages,
+            model=model,
+            response_format=_RERANK_RESPONSE_FORMAT,
+            temperature=0,
+            seed=_RERANK_SEED,
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"LLM rerank raw response: {response_json}")
+        for entry in response_json["ranking"]:
+            yield entry["i"], float(entry["score"])
+        return
+
+    stream = client.chat_completion_stream(
+        messages=messages,
+        model=model,
+        response_format=_RERANK_RESPONSE_FORMAT,
+        temperature=0,
+        seed=_RERANK_SEED,
+    )
+    content = ""
+    position = 0
+    try:
+        for fragment in stream:
+            content += fragment
+            for match in _RANKING_ENTRY_RE.finditer(content, position):
+                position = match.end()
+                yield int(match.group(1)), float(match.group(2))
+    finally:
+        stream.close()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"LLM rerank raw response: {content}")
+
+
+def _request_sharded_ranking(
+    client: Any,
+    model: str,
+    query: str,
+    query_specs: Dict[str, str],
+    is_ordering_number: bool,
+    results: List[Dict[str, Any]],
+    top_k: int,
+) -> Tuple[List[int], Dict[int, float]]:
+    """
+    Rank a large candidate list as parallel shards and merge them.
+
+    Each shard of RERANK_SHARD_SIZE candidates is ranked by its own LLM call
+    (local indices 0..n-1); local indices are mapped back to global ones and
+    all returned items are merged by relevancy score. A failed shard only
+    loses its own candidates.
+
+    Returns:
+        (valid_indices, relevancy_scores) with global indices, truncated to top_k.
+    """
+    offsets = list(range(0, len(results), RERANK_SHARD_SIZE))
+
+    def rank_shard(offset: int) -> Tuple[int, List[int], Dict[int, float]]:
+        shard = results[offset:offset + RERANK_SHARD_SIZE]
+        indices, scores = _request_llm_ranking(
+            client, model, query, query_specs, is_ordering_number, shard, min(top_k, len(shard))
+        )
+        return offset, indices, scores
+
+    merged: List[Tuple[int, float]] = []
+    relevancy_scores: Dict[int, float] = {}
+    with ThreadPoolExecutor(max_workers=min(RERANK_SHARD_WORKERS, len(offsets))) as executor:
+        futures = [executor.submit(rank_shard, offset) for offset in offsets]
+        for future in futures:
+            try:
+                offset, indices, scores = future.result()
+            except Exception as e:
+                logger.warning(f"Rerank shard failed, dropping its candidates: {str(e)}")
+                continue
+            for local_idx in indices:
+                global_idx = local_idx + offset
+                score = scores.get(local_idx)
+                if score is not None:
+                    relevancy_scores[global_idx] = score
+                merged.append((global_idx, 0.0 if score is None else score))
+
+    # Stable sort keeps shard order for equal scores
+    merged.sort(key=lambda x: x[1], reverse=True)
+    logger.info(f"Merged {len(merged)} ranked candidates from {len(offsets)} rerank shards")
+    return [idx for idx, _ in merged[:top_k]], relevancy_scores
+
+
 def rerank_results(
     query: str,
     results: List[Dict[str, Any]],
     top_k: int = 5,
+    skip_rerank_if_complete: Optional[bool] = None,
 ) -> List[Dict[str, Any]]:
     """
     Re-rank search results using an OpenAI small model (e.g. gpt-4o-mini).
@@ -181,6 +954,8 @@ def rerank_results(
         query: Original user query string.
         results: List of search result dictionaries (as returned from SearchService).
         top_k: Desired number of top results to return.
+        skip_rerank_if_complete: If True and top_k covers every result, skip the LLM
+            and return results sorted by score. Defaults to RERANK_SKIP_WHEN_COMPLETE.
 
     Returns:
         A list of re-ranked results (same schema as `results`), truncated to `top_k`,
@@ -192,201 +967,62 @@ def rerank_results(
     # Clamp top_k to sensible bounds
     top_k = max(1, min(top_k, len(results)))
 
+    if skip_rerank_if_complete is None:
+        skip_rerank_if_complete = RERANK_SKIP_WHEN_COMPLETE
+    if skip_rerank_if_complete and top_k >= len(results):
+        logger.info(f"top_k={top_k} covers all {len(results)} results, skipping LLM rerank")
+        return sorted(results, key=lambda r: r.get("score", 0.0), reverse=True)
+
     try:
-        client = _get_openai_client()
-        
         # Detect query type
         is_ordering_number = _is_ordering_number_query(query)
         query_specs = _extract_specs_from_query(query) if not is_ordering_number else {}
 
-        logger.info(f"Starting rerank for query: {query}, is_ordering_number: {is_ordering_number}, query_specs: {query_specs}, num_results: {len(results)}, top_k: {top_k}")
-
-        # Serialize results with extracted specifications
-        serialized_results = []
-        for idx, item in enumerate(results):
-            search_text = item.get("searchText", "")
-            product_specs = _extract_specifications(search_text)
-            
-            serialized_results.append(
-                {
-                    "index": idx,
-                    "orderingNumber": item.get("orderingNumber"),
-                    "category": item.get("category"),
-                    "score": item.get("score"),
-                    "relevance": item.get("relevance"),
-                    "searchText": search_text,
-                    "specifications": product_specs if product_specs else None,  # Include specs if available
-                }
-            )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Starting rerank for query: {query}, is_ordering_number: {is_ordering_number}, query_specs: {query_specs}, num_results: {len(results)}, top_k: {top_k}")
 
-        # Log a small sample of serialized results for debugging (avoid huge payloads)
-        if serialized_results:
-            sample_for_log = serialized_results[:5]
-            logger.info(f"Serialized results sample for rerank: {sample_for_log}")
-
-        # Build system prompt based on query type
+        # Exact orderingNumber hits need no LLM judgement
         if is_ordering_number:
-            system_prompt = (
-                "You are a retrieval re-ranking engine that optimizes search results for relevance.\n\n"
-                "Given a user query that appears to be an ORDERING NUMBER (product code/identifier) and a list of candidate results, your job is to:\n"
-                "1. Carefully read the query and each candidate's fields (orderingNumber, category, searchText, score, relevance).\n"
-                "2. Judge how relevant each candidate is to the query, prioritizing:\n"
-                "   - EXACT MATCH on orderingNumber (highest priority).\n"
-                "   - Case-insensitive exact match on orderingNumber.\n"
-                "   - Prefix match on orderingNumber (query starts with or contains the orderingNumber).\n"
-                "   - Category alignment when relevant.\n"
-                "   - The original similarity score and relevance label as a soft signal only.\n"
-                "3. Select the single best set of top results strictly from the provided list.\n\n"
-                "Important rules:\n"
-                "- NEVER invent or fabricate new items.\n"
-                "- ONLY reference candidates by their provided `index`.\n"
-                "- Prioritize exact orderingNumber matches above all else.\n"
-                "- Do not perform any fuzzy creative interpretation; be precise and conservative.\n\n"
-                "Output format:\n"
-                "- You MUST respond with valid JSON only, no extra text.\n"
-                "- The JSON must have the shape:\n"
-                '  {\"top_indices\": [i1, i2, ...], \"relevancy_scores\": {\"i1\": 0.95, \"i2\": 0.85, ...} }\n'
-                "- `top_indices` must be a list of unique integers that exist in the input indices.\n"
-                "- `relevancy_scores` must be a dictionary mapping index (as string) to a relevancy score (0.0-1.0).\n"
-                "- Return them in the desired order from most relevant to least relevant.\n"
-                "- Relevancy scores should reflect how well each result matches the query (1.0 = perfect match, 0.0 = poor match).\n"
-            )
-        else:
-            system_prompt = (
-                "You are a retrieval re-ranking engine that optimizes search results for relevance.\n\n"
-                "Given a user query that appears to be a PRODUCT DESCRIPTION (natural language) and a list of candidate results, your job is to:\n"
-                "1. Carefully read the query and each candidate's fields (orderingNumber, category, searchText, specifications, score, relevance).\n"
-                "2. Extract any technical specifications from the query (e.g., size, pressure, material, temperature, thread type).\n"
-                "   Treat NUMERIC SPECIFICATIONS (especially sizes and pressures) as VERY IMPORTANT SIGNALS, but do not fully disqualify other items.\n"
-                "3. Judge how relevant each candidate is to the query, prioritizing:\n"
-                "   - TECHNICAL SPECIFICATIONS MATCH (HIGHEST PRIORITY SIGNAL):\n"
-                "     * Compare specifications from the query with product specifications.\n"
-                "     * Products whose size/pressure/material clearly MATCH the query should be ranked at the top with high relevancy scores.\n"
-                "     * Products whose size/pressure/material clearly DO NOT match the query requirements should receive much lower relevancy scores and appear below matching items, but may still appear in the list if there are few or no exact matches.\n"
-                "     * When the query includes an explicit size (e.g. '1/4 inch', '3/8\"', '1 inch'), items with that SAME size should be ranked above items with different sizes.\n"
-                "     * Do NOT rank items with different sizes (e.g. '1/4', '3/8', '1/2', '1\"') above exact size matches, unless the query clearly allows a range or alternatives.\n"
-                "   - Semantic match between the query description and searchText.\n"
-                "   - Category alignment when relevant.\n"
-                "   - The original similarity score and relevance label as a soft signal only.\n"
-                "4. CRITICAL: Strongly down-rank products with specifications that are clearly incompatible with the query (give them noticeably lower relevancy scores), rather than completely rejecting them.\n"
-                "   For example:\n"
-                "   - If the query asks for '1/2 inch' but a product has '3/4 inch' or '1/4 inch', those products should be ranked significantly lower than any '1/2 inch' products, with clearly lower relevancy scores.\n"
-                "   - If the query asks for '1/4 inch' NPT, then '1/4' NPT products should be ranked above '3/8', '1/2', or '1 inch' products, and given higher relevancy scores.\n"
-                "   - If the query asks for '1000psi' but a product has '500psi', it should be ranked lower unless the query explicitly allows lower pressure ratings.\n"
-                "5. When some products are missing a specification that is clearly required by the query (for example, no size is specified on the product but the query includes a size), rank them BELOW products with explicit, matching specifications, but they may still appear with moderate or low relevancy scores.\n"
-                "6. Select the single best set of top results strictly from the provided list.\n\n"
-                "Important rules:\n"
-                "- NEVER invent or fabricate new items.\n"
-                "- ONLY reference candidates by their provided `index`.\n"
-                "- SPECIFICATIONS ARE CRITICAL: Products with incompatible specifications must be ranked much lower and should not appear above exact or clearly compatible matches, but they can still appear as lower-ranked options.\n"
-                "- If several items are similarly relevant, prefer those with clearer, more specific searchText and matching specifications.\n"
-                "- Do not perform any fuzzy creative interpretation; be precise and conservative when comparing numeric values like sizes and pressures.\n\n"
-                "Output format:\n"
-                "- You MUST respond with valid JSON only, no extra text.\n"
-                "- The JSON must have the shape:\n"
-                '  {\"top_indices\": [i1, i2, ...], \"relevancy_scores\": {\"i1\": 0.95, \"i2\": 0.85, ...} }\n'
-                "- `top_indices` must be a list of unique integers that exist in the input indices.\n"
-                "- `relevancy_scores` must be a dictionary mapping index (as string) to a relevancy score (0.0-1.0).\n"
-                "- Return them in the desired order from most relevant to least relevant.\n"
-                "- Relevancy scores should reflect how well each result matches the query, with special attention to specification compatibility, especially exact numeric matches for size and pressure.\n"
-            )
-
-        # Build user prompt with query specifications if available
-        query_info = f"Query:\n{query}\n"
-        if query_specs:
-            query_info += f"\nExtracted specifications from query:\n{json.dumps(query_specs, ensure_ascii=False)}\n"
-        
-        user_prompt = (
-            "Re-rank the following search results for the given query.\n\n"
-            f"{query_info}\n"
-            "Candidate results (JSON list):\n"
-            f"{json.dumps(serialized_results, ensure_ascii=False)}\n\n"
-            f"Return at most {top_k} items via their indices in the required JSON format, "
-            "along with relevancy scores for each item."
-        )
+            matched = _match_ordering_number(query, results, top_k)
+            if matched is not None:
+                valid_indices, relevancy_scores = matched
+                _fill_to_top_k(results, valid_indices, top_k)
+                logger.info(f"Ordering number match for query '{query}', skipping LLM rerank")
+                return _apply_ranking(results, valid_indices, relevancy_scores)
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
+        model = os.getenv("OPENAI_RERANK_MODEL", "gpt-4o-mini")
 
-        response_json = client.chat_completion_json(
-            messages=messages,
-            model=os.getenv("OPENAI_RERANK_MODEL", "gpt-4o-mini"),
-            temperature=0,
-        )
+        # Reuse a previous ranking of the same candidate set when possible
+        # (scoped to the query specs, so a semantic hit never crosses sizes/ratings)
+        fingerprint = _candidate_fingerprint(results, top_k, model, query_specs)
+        cached, query_vector = _rerank_cache_lookup(fingerprint, query, results)
+        if cached is not None:
+            valid_indices, relevancy_scores = cached
+            logger.info(f"Rerank cache hit for query '{query}' ({len(valid_indices)} results)")
+            return _apply_ranking(results, valid_indices, relevancy_scores)
 
-        logger.info(
-            f"LLM rerank raw response: {response_json}"
-        )
+        client = _get_openai_client()
 
-        raw_indices = response_json.get("top_indices") or []
-        relevancy_scores = response_json.get("relevancy_scores") or {}
-        
-        if not isinstance(raw_indices, list):
-            logger.warning("Unexpected LLM response format for top_indices, skipping rerank")
-            return results
-
-        # Sanitize and deduplicate indices
-        seen = set()
-        valid_indices: List[int] = []
-        for idx in raw_indices:
-            try:
-                i = int(idx)
-            except (TypeError, ValueError):
-                continue
-            if 0 <= i < len(results) and i not in seen:
-                seen.add(i)
-                valid_indices.append(i)
-            if len(valid_indices) >= top_k:
-                break
+        if RERANK_SHARD_THRESHOLD and len(results) > RERANK_SHARD_THRESHOLD:
+            valid_indices, relevancy_scores = _request_sharded_ranking(
+                client, model, query, query_specs, is_ordering_number, results, top_k
+            )
+        else:
+            valid_indices, relevancy_scores = _request_llm_ranking(
+                client, model, query, query_specs, is_ordering_number, results, top_k
+            )
 
         if not valid_indices:
             logger.warning("LLM returned no valid indices; falling back to original ranking")
             return results[:top_k]
 
         # If LLM returned fewer than top_k, fill remaining slots with highest-scoring original results
-        if len(valid_indices) < top_k:
-            # Get all indices not already selected, sorted by original score (descending)
-            remaining_indices = [
-                (i, results[i].get('score', 0.0))
-                for i in range(len(results))
-                if i not in seen
-            ]
-            # Sort by score descending, then take top ones to fill up to top_k
-            remaining_indices.sort(key=lambda x: x[1], reverse=True)
-            needed = top_k - len(valid_indices)
-            for i, _ in remaining_indices[:needed]:
-                valid_indices.append(i)
-            logger.info(f"Filled {needed} additional slots from original ranking to reach top_k={top_k}")
+        _fill_to_top_k(results, valid_indices, top_k)
+
+        _rerank_cache_store(fingerprint, query, query_vector, results, valid_indices, relevancy_scores)
 
         # Re-rank results and override confidence scores based on relevancy
-        re_ranked = []
-        for idx in valid_indices:
-            result = results[idx].copy()
-            
-            # Override confidence score based on reranking relevancy
-            idx_str = str(idx)
-            if idx_str in relevancy_scores:
-                relevancy_score = relevancy_scores[idx_str]
-                try:
-                    # Convert relevancy score to confidence (0-100)
-                    new_confidence = float(relevancy_score) * 100
-                    # Update both score and confidence fields
-                    result['score'] = float(relevancy_score)
-                    result['confidence'] = round(new_confidence)
-                    # Update relevance label based on new score
-                    if relevancy_score >= 0.70:
-                        result['relevance'] = 'high'
-                    elif relevancy_score >= 0.50:
-                        result['relevance'] = 'medium'
-                    else:
-                        result['relevance'] = 'low'
-                    logger.debug(f"Updated result {idx} confidence: {result.get('score', 'N/A')} -> {relevancy_score} (confidence: {new_confidence})")
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Invalid relevancy score for index {idx}: {relevancy_scores[idx_str]}, keeping original score")
-            
-            re_ranked.append(result)
+        re_ranked = _apply_ranking(results, valid_indices, relevancy_scores)
         
         logger.info(
             f"Re-ranked {len(re_ranked)} results for query '{query}' "
@@ -396,9 +1032,28 @@ def rerank_results(
         return re_ranked
 
     except Exception as e:
-        logger.error(f"Error during OpenAI re-ranking: {str(e)}", exc_info=True)
+        # Handled failure: keep the log line cheap during an OpenAI outage and
+        # only format the traceback when DEBUG logging is on
+        logger.warning(f"Error during OpenAI re-ranking, using original ranking: {str(e)}")
+        logger.debug("OpenAI re-ranking failure traceback", exc_info=True)
         # In case of any failure, gracefully fall back to original ranking
         return results[:top_k]
 
 
+def _prewarm_openai_connection() -> None:
+    """
+    Open the OpenAI HTTPS connection ahead of the first rerank.
+
+    Failures are logged and swallowed so a transient error cannot break the
+    Lambda's init phase.
+    """
+    try:
+        client = _get_openai_client()
+        client.client.models.retrieve(os.getenv("OPENAI_RERANK_MODEL", "gpt-4o-mini"))
+        logger.info("Prewarmed OpenAI connection for reranking")
+    except Exception as e:
+        logger.warning(f"OpenAI connection prewarm failed: {str(e)}")
+
 
+if RERANK_PREWARM:
+    _prewarm_openai_connection()
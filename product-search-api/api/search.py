@@ -7,12 +7,18 @@ import os
 from typing import Dict, Any
 
 from .utils import get_query_params, create_response, get_search_service
+from .qdrant_search import is_code_like_query
 from .rerank_openai import rerank_results
 
 # Configure logging
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+# Only the best RERANK_CANDIDATE_MULTIPLIER * result_size retrieved results (at
+# least _RERANK_MIN_CANDIDATES) are sent to the LLM re-ranker; 0 sends them all
+RERANK_CANDIDATE_MULTIPLIER = int(os.getenv('RERANK_CANDIDATE_MULTIPLIER', '4'))
+_RERANK_MIN_CANDIDATES = 20
+
 
 def handle_search(
     event: Dict[str, Any],
@@ -93,12 +99,7 @@ def handle_search(
         
         # Detect if query looks like an orderingNumber (code-like query)
         # Same heuristic as in qdrant_search.py
-        q = query.strip()
-        has_space = " " in q
-        has_letter = any(c.isalpha() for c in q)
-        has_digit = any(c.isdigit() for c in q)
-        allowed_chars = all(c.isalnum() or c in "-_./" for c in q)
-        is_ordering_number_like = (not has_space) and has_letter and has_digit and allowed_chars
+        is_ordering_number_like = is_code_like_query(query)
         
         # Boost exact matches for orderingNumber-like queries
         # This ensures exact matches appear first, even if they have lower vector similarity scores
@@ -116,13 +117,20 @@ def handle_search(
         # Optional LLM-based re-ranking (only if enough results to matter)
         # Skip AI re-ranking for orderingNumber-like queries since we already boosted exact matches
         if should_use_ai and len(results) > 5 and not is_ordering_number_like:
+            # Results are ordered by vector score, so the tail rarely makes the
+            # final cut; trimming it keeps the prompt (and LLM latency) small
+            candidates = results
+            if RERANK_CANDIDATE_MULTIPLIER > 0:
+                max_candidates = max(num_results_to_return * RERANK_CANDIDATE_MULTIPLIER, _RERANK_MIN_CANDIDATES)
+                candidates = results[:max_candidates]
             logger.info(
-                "Invoking OpenAI re-ranking for query '%s' with %d candidates (top %d)",
+                "Invoking OpenAI re-ranking for query '%s' with %d of %d candidates (top %d)",
                 query,
+                len(candidates),
                 len(results),
                 num_results_to_return,
             )
-            results = rerank_results(query=query, results=results, top_k=num_results_to_return)
+            results = rerank_results(query=query, results=candidates, top_k=num_results_to_return)
         else:
             # If we are not re-ranking, still respect the requested number of results to return
             results = results[:num_results_to_return]
@@ -6,16 +6,17 @@ import os
 import json
 import logging
 from typing import Dict, Any
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, unquote_plus
 import sys
 
 # Add parent and shared directories to path
-SERVICE_ROOT = os.path.dirname(os.path.dirname(__file__))
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPO_ROOT = os.path.abspath(os.path.join(SERVICE_ROOT, ".."))
 SHARED_DIR = os.path.abspath(os.path.join(REPO_ROOT, "shared"))
 
-for path in {SERVICE_ROOT, REPO_ROOT, SHARED_DIR}:
-    if path not in sys.path:
+# Fixed order, and only directories that exist in this deployment
+for path in (SERVICE_ROOT, REPO_ROOT, SHARED_DIR):
+    if path not in sys.path and os.path.isdir(path):
         sys.path.append(path)
 
 from .qdrant_search import SearchService
@@ -24,6 +25,27 @@ from .qdrant_search import SearchService
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+# Prefer orjson (C extension) for request/response JSON; fall back to json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize a response body to a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj)
+
+
+def json_loads(data: Any) -> Any:
+    """Parse a JSON request body (raises json.JSONDecodeError on bad input)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 # Global search service (reused across invocations)
 search_service = None
 
@@ -38,6 +60,26 @@ def get_search_service() -> SearchService:
     return search_service
 
 
+def _parse_query_string(raw: str) -> Dict[str, Any]:
+    """
+    Parse a raw query string in a single pass.
+    
+    Matches parse_qs (blank values are dropped) with single values unwrapped;
+    a repeated key falls back to parse_qs so multi-value params stay lists.
+    """
+    params = {}
+    for pair in raw.split('&'):
+        key, sep, value = pair.partition('=')
+        if not sep or not value:
+            continue
+        key = unquote_plus(key)
+        if key in params:
+            parsed = parse_qs(raw)
+            return {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
+        params[key] = unquote_plus(value)
+    return params
+
+
 def get_query_params(event: Dict[str, Any]) -> Dict[str, str]:
     """
     Extract query parameters from API Gateway event.
@@ -56,12 +98,26 @@ def get_query_params(event: Dict[str, Any]) -> Dict[str, str]:
     
     # Handle URL-encoded parameters
     elif 'rawQueryString' in event:
-        parsed = parse_qs(event['rawQueryString'])
-        params = {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
+        params = _parse_query_string(event['rawQueryString'])
     
     return params
 
 
+# Headers sent with every response (JSON content type, CORS, security)
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Api-Key',
+    # Security headers
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+}
+
+
 def create_response(
     status_code: int,
     body: Any,
@@ -78,25 +134,12 @@ def create_response(
     Returns:
         API Gateway response
     """
-    default_headers = {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Api-Key',
-        # Security headers
-        'X-Content-Type-Options': 'nosniff',
-        'X-Frame-Options': 'DENY',
-        'X-XSS-Protection': '1; mode=block',
-        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
-        'Referrer-Policy': 'strict-origin-when-cross-origin',
-    }
-    
-    if headers:
-        default_headers.update(headers)
+    # Copy so per-response headers never leak into the shared defaults
+    default_headers = {**DEFAULT_HEADERS, **headers} if headers else DEFAULT_HEADERS.copy()
     
     return {
         'statusCode': status_code,
         'headers': default_headers,
-        'body': json.dumps(body) if not isinstance(body, str) else body
+        'body': json_dumps(body) if not isinstance(body, str) else body
     }
 
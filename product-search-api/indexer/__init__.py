@@ -5,4 +5,5 @@ Indexer package for search service.
 from .handler import *
 from .qdrant_client import *
 from .embedding_bedrock import *
+from .embedding_local import *
 from .transformers import *
\ No newline at end of file
@@ -6,12 +6,45 @@ NO DOCKER NEEDED - uses cloud API instead of local models.
 import os
 import logging
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Union
 import boto3
+import numpy as np
+from botocore.config import Config
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+# Query embeddings memoized per container (0 disables)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '256'))
+
+# Concurrent Bedrock requests when embedding a list of texts (Bedrock embedding
+# models take one text per request, so batches are parallelized instead)
+EMBEDDING_MAX_WORKERS = int(os.getenv('EMBEDDING_MAX_WORKERS', '8'))
+
+# Bedrock runtime client config: adaptive retries on throttling, TCP keepalive
+# on idle pooled connections, and a pool large enough for concurrent embeds
+BEDROCK_CLIENT_CONFIG = Config(
+    retries={'max_attempts': 3, 'mode': 'adaptive'},
+    tcp_keepalive=True,
+    max_pool_connections=max(10, EMBEDDING_MAX_WORKERS * 2)
+)
+
+# Shared boto3 session (reused across EmbeddingGenerator instances and Lambda
+# invocations so credential resolution and pooled HTTPS connections are kept)
+_boto3_session = None
+
+
+def get_boto3_session() -> boto3.Session:
+    """Get or create singleton boto3 session."""
+    global _boto3_session
+    
+    if _boto3_session is None:
+        _boto3_session = boto3.Session()
+    
+    return _boto3_session
+
 
 class EmbeddingGenerator:
     """
@@ -24,8 +57,12 @@ class EmbeddingGenerator:
         self.model_name = os.getenv('EMBEDDING_MODEL', 'amazon.titan-embed-text-v1')
         self.region = os.getenv('AWS_REGION', 'us-east-1')
         
-        # Initialize Bedrock client
-        self.bedrock = boto3.client('bedrock-runtime', region_name=self.region)
+        # Initialize Bedrock client (created once per container via get_embedding_generator)
+        self.bedrock = get_boto3_session().client(
+            'bedrock-runtime',
+            region_name=self.region,
+            config=BEDROCK_CLIENT_CONFIG
+        )
         
         # Set vector size based on model
         if 'titan' in self.model_name.lower():
@@ -41,6 +78,9 @@ class EmbeddingGenerator:
         """
         Generate embeddings for text using AWS Bedrock.
         
+        A list of texts is embedded with up to EMBEDDING_MAX_WORKERS concurrent
+        requests; vectors are returned in input order.
+        
         Args:
             text: Single text string or list of strings
             
@@ -55,38 +95,12 @@ class EmbeddingGenerator:
         texts = [text] if is_single else text
         
         try:
-            embeddings = []
-            
-            for t in texts:
-                # Prepare request based on model
-                if 'titan' in self.model_name.lower():
-                    body = json.dumps({"inputText": t})
-                elif 'cohere' in self.model_name.lower():
-                    body = json.dumps({"texts": [t], "input_type": "search_document"})
-                else:
-                    body = json.dumps({"inputText": t})
-                
-                # Call Bedrock
-                response = self.bedrock.invoke_model(
-                    modelId=self.model_name,
-                    body=body,
-                    contentType='application/json',
-                    accept='application/json'
-                )
-                
-                # Parse response
-                response_body = json.loads(response['body'].read())
-                
-                # Extract embedding based on model
-                if 'titan' in self.model_name.lower():
-                    embedding = response_body.get('embedding')
-                elif 'cohere' in self.model_name.lower():
-                    embedding = response_body.get('embeddings', [[]])[0]
-                else:
-                    embedding = response_body.get('embedding')
-                
-                embeddings.append(embedding)
-                logger.debug(f"Generated embedding with dimension {len(embedding)}")
+            if len(texts) == 1 or EMBEDDING_MAX_WORKERS <= 1:
+                embeddings = [self._embed_one(t) for t in texts]
+            else:
+                # boto3 clients are thread-safe; the requests are network-bound
+                with ThreadPoolExecutor(max_workers=min(EMBEDDING_MAX_WORKERS, len(texts))) as executor:
+                    embeddings = list(executor.map(self._embed_one, texts))
             
             return embeddings[0] if is_single else embeddings
             
@@ -94,6 +108,50 @@ class EmbeddingGenerator:
             logger.error(f"Error generating Bedrock embeddings: {str(e)}", exc_info=True)
             raise
     
+    def _embed_one(self, text: str) -> List[float]:
+        """Embed a single text with one Bedrock invoke_model call."""
+        # Prepare request based on model
+        if 'titan' in self.model_name.lower():
+            body = json.dumps({"inputText": text})
+        elif 'cohere' in self.model_name.lower():
+            body = json.dumps({"texts": [text], "input_type": "search_document"})
+        else:
+            body = json.dumps({"inputText": text})
+        
+        # Call Bedrock
+        response = self.bedrock.invoke_model(
+            modelId=self.model_name,
+            body=body,
+            contentType='application/json',
+            accept='application/json'
+        )
+        
+        # Parse response
+        response_body = json.loads(response['body'].read())
+        
+        # Extract embedding based on model
+        if 'titan' in self.model_name.lower():
+            embedding = response_body.get('embedding')
+        elif 'cohere' in self.model_name.lower():
+            embedding = response_body.get('embeddings', [[]])[0]
+        else:
+            embedding = response_body.get('embedding')
+        
+        logger.debug(f"Generated embedding with dimension {len(embedding)}")
+        return embedding
+    
+    def warmup(self) -> None:
+        """
+        Issue a throwaway embedding request so the first real query does not
+        pay for TLS setup, credential resolution and signer initialization.
+        Failures are logged and ignored.
+        """
+        try:
+            self.generate("warmup")
+            logger.info("Bedrock embedding client warmed up")
+        except Exception as e:
+            logger.warning(f"Bedrock embedding warmup failed: {str(e)}")
+    
     def get_vector_size(self) -> int:
         """Get the dimension of embedding vectors."""
         return self.vector_size
@@ -104,11 +162,45 @@ _embedding_generator = None
 
 
 def get_embedding_generator() -> EmbeddingGenerator:
-    """Get or create singleton embedding generator."""
+    """
+    Get or create singleton embedding generator.
+    
+    The backend is selected with EMBEDDER_BACKEND:
+    - `bedrock` (default): AWS Bedrock API
+    - `fastembed`: in-process FastEmbed model (see embedding_local)
+    
+    The indexer and the search API must use the same backend and model,
+    and VECTOR_SIZE must match the chosen model's dimension.
+    """
     global _embedding_generator
     
     if _embedding_generator is None:
-        _embedding_generator = EmbeddingGenerator()
+        backend = os.getenv('EMBEDDER_BACKEND', 'bedrock').lower()
+        if backend == 'fastembed':
+            from .embedding_local import LocalEmbeddingGenerator
+            _embedding_generator = LocalEmbeddingGenerator()
+        else:
+            _embedding_generator = EmbeddingGenerator()
     
     return _embedding_generator
 
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def embed_query_array(query: str) -> np.ndarray:
+    """
+    Get the embedding for a search query as a read-only float32 array.
+    
+    One search request embeds the same query more than once (vector search,
+    then the rerank semantic cache), and popular queries repeat across
+    requests; both reuse the memoized vector instead of calling Bedrock again.
+    Vectors are held as float32 (4 bytes per dimension rather than a boxed
+    Python float). Failures are not cached.
+    """
+    vector = np.asarray(get_embedding_generator().generate(query), dtype=np.float32)
+    vector.flags.writeable = False
+    return vector
+
+
+def embed_query(query: str) -> List[float]:
+    """Get the memoized query embedding as a list (the form Qdrant requests take)."""
+    return embed_query_array(query).tolist()
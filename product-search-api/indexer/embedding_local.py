@@ -0,0 +1,70 @@
+"""
+In-process embedding generation using FastEmbed (ONNX Runtime).
+Avoids the Bedrock network round-trip per query at the cost of model RAM.
+"""
+
+import os
+import logging
+from typing import List, Union
+
+logger = logging.getLogger(__name__)
+logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+
+class LocalEmbeddingGenerator:
+    """
+    Generates embeddings in-process using FastEmbed.
+    Same interface as the Bedrock EmbeddingGenerator.
+    """
+
+    def __init__(self):
+        """Load the FastEmbed model."""
+        self.model_name = os.getenv('LOCAL_EMBEDDING_MODEL', 'BAAI/bge-small-en-v1.5')
+
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise RuntimeError(
+                f"EMBEDDER_BACKEND=fastembed requires the 'fastembed' package. "
+                f"Import error: {str(e)}"
+            )
+
+        self.model = TextEmbedding(model_name=self.model_name)
+        self.vector_size = len(next(iter(self.model.embed(["warmup"]))))
+
+        logger.info(
+            f"Local embedding generator initialized with FastEmbed model: {self.model_name} "
+            f"(dimension {self.vector_size})"
+        )
+
+    def generate(self, text: Union[str, List[str]]) -> Union[List[float], List[List[float]]]:
+        """
+        Generate embeddings for text in-process.
+
+        Args:
+            text: Single text string or list of strings
+
+        Returns:
+            Single embedding vector or list of vectors
+        """
+        if not text:
+            logger.warning("Empty text provided, returning zero vector")
+            return [0.0] * self.vector_size
+
+        is_single = isinstance(text, str)
+        texts = [text] if is_single else text
+
+        try:
+            embeddings = [embedding.tolist() for embedding in self.model.embed(texts)]
+            return embeddings[0] if is_single else embeddings
+        except Exception as e:
+            logger.error(f"Error generating local embeddings: {str(e)}", exc_info=True)
+            raise
+
+    def warmup(self) -> None:
+        """No-op: the model is loaded and exercised in __init__."""
+        return None
+
+    def get_vector_size(self) -> int:
+        """Get the dimension of embedding vectors."""
+        return self.vector_size
@@ -6,17 +6,20 @@ Triggered by DynamoDB Streams to index products into Qdrant.
 
 import os
 import json
+import hashlib
 import logging
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
 import sys
 
 # Add parent directory and shared path to sys.path for imports
-SERVICE_ROOT = os.path.dirname(os.path.dirname(__file__))
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 REPO_ROOT = os.path.abspath(os.path.join(SERVICE_ROOT, ".."))
 SHARED_DIR = os.path.join(REPO_ROOT, "shared")
 
-for path in {SERVICE_ROOT, REPO_ROOT, SHARED_DIR}:
-    if path not in sys.path:
+# Fixed order, and only directories that exist in this deployment
+for path in (SERVICE_ROOT, REPO_ROOT, SHARED_DIR):
+    if path not in sys.path and os.path.isdir(path):
         sys.path.append(path)
 
 from shared.product_service import fetch_product
@@ -32,6 +35,9 @@ from .transformers import prepare_product_metadata, prepare_search_text
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+# Concurrent product fetches (DynamoDB reads) when preparing stream records
+FETCH_MAX_WORKERS = int(os.getenv('INDEXER_FETCH_WORKERS', '16'))
+
 # Global clients (reused across Lambda invocations)
 qdrant_manager = None
 embedding_generator = None
@@ -42,30 +48,37 @@ def get_qdrant_manager() -> QdrantManager:
     global qdrant_manager
     
     if qdrant_manager is None:
+        # QdrantManager ensures the collection exists on construction
         qdrant_manager = QdrantManager()
-        # Ensure collection exists
-        qdrant_manager.ensure_collection_exists()
     
     return qdrant_manager
 
 
-def process_insert_or_modify(record: Dict[str, Any]) -> None:
+# (orderingNumber, searchText, metadata) of a product ready to be embedded
+PreparedProduct = Tuple[str, str, ProductMetadata]
+
+
+def prepare_insert_or_modify(record: Dict[str, Any]) -> Optional[PreparedProduct]:
     """
-    ADD GET PRODUCT FUNCTION FROM OTHER SERVICE - TO GET ALL PRODUCT INFORMATION.
-    
-    Process INSERT or MODIFY events from DynamoDB Stream.
+    Fetch the product behind an INSERT or MODIFY record and build its search text
+    and metadata, without embedding or indexing it yet.
     
     Args:
         record: DynamoDB Stream record
+        
+    Returns:
+        (orderingNumber, searchText, metadata), or None if the record is skipped
     """
     try:
         # Extract new image
         new_image = record['dynamodb'].get('NewImage')
         if not new_image:
             logger.warning("No NewImage in record, skipping")
-            return
+            return None
         
-        logger.info(f"NewImage: {json.dumps(new_image, indent=2)}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"NewImage: {json.dumps(new_image, default=str)}")
 
         decoded_image = decode_dynamo_image(new_image)
         ordering_number = decoded_image.get('orderingNumber')
@@ -76,47 +89,162 @@ def process_insert_or_modify(record: Dict[str, Any]) -> None:
         
         if not ordering_number:
             logger.error("Product missing orderingNumber, cannot index")
-            return
+            return None
         
         logger.info(f"Indexing product: {ordering_number}")
         
         # Fetch full product with pointers resolved (no snapshots)
         product_data = fetch_product(ordering_number)
-        print(f"Product data: {json.dumps(product_data, indent=2)}")
+        if debug:
+            logger.debug(f"Product data: {json.dumps(product_data, default=str)}")
 
         # Prepare text for embedding
         search_text = prepare_search_text(product_data)
-        print(f"Search text: {json.dumps(search_text, indent=2)}")
+        if debug:
+            logger.debug(f"Search text: {json.dumps(search_text)}")
         
         if not search_text or search_text.strip() == "":
             logger.warning(f"No searchable text for product {ordering_number}, skipping")
-            return
-        
-        # Generate embedding
-        embedding_gen = get_embedding_generator()
-        vector = embedding_gen.generate(search_text)
-        print(f"Successfully generated embedding vector")
+            return None
         
         # Prepare metadata
         metadata: ProductMetadata = prepare_product_metadata(product_data)  # type: ignore[assignment]
         metadata["searchText"] = search_text
-        print(f"Metadata: {json.dumps(metadata, indent=2)}")
-        
-        # Upsert to Qdrant
-        qdrant = get_qdrant_manager()
-        qdrant.upsert_product(
-            ordering_number=ordering_number,
-            vector=vector,
-            metadata=metadata
-        )
+        if debug:
+            logger.debug(f"Metadata: {json.dumps(metadata, default=str)}")
         
-        logger.info(f"Successfully indexed product {ordering_number}")
+        return ordering_number, search_text, metadata
         
     except Exception as e:
         logger.error(f"Error processing INSERT/MODIFY: {str(e)}", exc_info=True)
         raise
 
 
+def prepare_records(
+    records: List[Dict[str, Any]]
+) -> List[Union[Optional[PreparedProduct], Exception]]:
+    """
+    Prepare INSERT/MODIFY records concurrently (each one fetches its product
+    from DynamoDB, which is network-bound).
+    
+    Returns:
+        One entry per record, in order: the prepared product, None if the record
+        was skipped, or the exception it raised
+    """
+    def prepare(record: Dict[str, Any]) -> Union[Optional[PreparedProduct], Exception]:
+        try:
+            return prepare_insert_or_modify(record)
+        except Exception as e:
+            return e
+    
+    if len(records) <= 1 or FETCH_MAX_WORKERS <= 1:
+        return [prepare(record) for record in records]
+    
+    with ThreadPoolExecutor(max_workers=min(FETCH_MAX_WORKERS, len(records))) as executor:
+        return list(executor.map(prepare, records))
+
+
+def _search_text_hash(model_name: str, search_text: str) -> str:
+    """Key of an embedding: the model plus the exact text that was embedded."""
+    return hashlib.sha256(f"{model_name}\x1e{search_text}".encode("utf-8")).hexdigest()[:32]
+
+
+def index_products(products: List[PreparedProduct]) -> None:
+    """
+    Embed and upsert prepared products: one (concurrent) embedding batch and
+    a single Qdrant upsert for the whole list.
+    
+    Products whose searchText (and embedding model) is unchanged since they
+    were last indexed only have their payload replaced: updates to
+    non-searchable fields (price, stock, ...) cost no Bedrock call and do not
+    move the stored vector over the wire.
+    
+    Args:
+        products: Products returned by prepare_insert_or_modify
+    """
+    if not products:
+        return
+    
+    embedding_gen = get_embedding_generator()
+    qdrant = get_qdrant_manager()
+    
+    point_ids = [qdrant._build_point_id(ordering_number) for ordering_number, _, _ in products]
+    for _, search_text, metadata in products:
+        metadata["searchTextHash"] = _search_text_hash(embedding_gen.model_name, search_text)
+    
+    stored = qdrant.get_search_text_hashes(point_ids)
+    unchanged: List[Tuple[str, ProductMetadata]] = []
+    to_embed: List[Tuple[str, str, ProductMetadata]] = []
+    for point_id, (_, search_text, metadata) in zip(point_ids, products):
+        if stored.get(point_id) == metadata["searchTextHash"]:
+            unchanged.append((point_id, metadata))
+        else:
+            to_embed.append((point_id, search_text, metadata))
+    
+    if to_embed:
+        vectors = embedding_gen.generate([search_text for _, search_text, _ in to_embed])
+        logger.info(f"Generated {len(to_embed)} embedding vectors, {len(unchanged)} products unchanged")
+        qdrant.batch_upsert_products([
+            {
+                'id': point_id,
+                'vector': vector,
+                'metadata': metadata,
+            }
+            for (point_id, _, metadata), vector in zip(to_embed, vectors)
+        ])
+    
+    if unchanged:
+        qdrant.batch_overwrite_payloads(unchanged)
+    
+    logger.info(f"Successfully indexed {len(products)} products")
+
+
+def process_insert_or_modify(record: Dict[str, Any]) -> None:
+    """
+    ADD GET PRODUCT FUNCTION FROM OTHER SERVICE - TO GET ALL PRODUCT INFORMATION.
+    
+    Process INSERT or MODIFY events from DynamoDB Stream.
+    
+    Args:
+        record: DynamoDB Stream record
+    """
+    prepared = prepare_insert_or_modify(record)
+    if prepared:
+        index_products([prepared])
+
+
+def _flush_pending(pending: List[PreparedProduct]) -> Tuple[int, int, List[str]]:
+    """
+    Index the products collected so far as one batch.
+    
+    If the batch fails, each product is retried on its own so a single bad
+    record only fails itself.
+    
+    Returns:
+        (processed, failed, errors) for the flushed products
+    """
+    if not pending:
+        return 0, 0, []
+    
+    try:
+        index_products(pending)
+        return len(pending), 0, []
+    except Exception as e:
+        logger.warning(f"Batch indexing of {len(pending)} products failed, retrying one by one: {str(e)}")
+    
+    processed = 0
+    errors = []
+    for product in pending:
+        try:
+            index_products([product])
+            processed += 1
+        except Exception as e:
+            error_msg = f"Error indexing product {product[0]}: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            errors.append(error_msg)
+    return processed, len(errors), errors
+
+
 def process_remove(record: Dict[str, Any]) -> None:
     """
     Process REMOVE events from DynamoDB Stream.
@@ -162,7 +290,7 @@ def handle_initialize() -> Dict[str, Any]:
     try:
         logger.info("Manual initialization requested")
         qdrant = get_qdrant_manager()
-        created = qdrant.ensure_collection_exists()
+        created = qdrant.ensure_collection_exists(force=True)
         
         message = "Collection created" if created else "Collection already exists"
         
@@ -254,45 +382,89 @@ def handle_delete_collection() -> Dict[str, Any]:
         }
 
 
-def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+def _record_ordering_number(record: Dict[str, Any]) -> Optional[str]:
+    """orderingNumber a stream record refers to (from its Keys, else its image)."""
+    stream_data = record.get('dynamodb') or {}
+    for image_name in ('Keys', 'NewImage', 'OldImage'):
+        image = stream_data.get(image_name)
+        if image:
+            ordering_number = decode_dynamo_image(image).get('orderingNumber')
+            if ordering_number:
+                return ordering_number
+    return None
+
+
+def coalesce_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Lambda handler for DynamoDB Stream events.
+    Keep only the last stream record for each orderingNumber, in stream order.
+    
+    Indexing fetches the product's current state, so when a batch holds several
+    events for one product (rapid successive writes) only the latest decides
+    the outcome: a later REMOVE supersedes earlier INSERT/MODIFY events and vice
+    versa. Records without an orderingNumber are kept as-is.
+    """
+    keys = [_record_ordering_number(record) for record in records]
+    last_index = {key: index for index, key in enumerate(keys) if key}
+    return [
+        record for index, (record, key) in enumerate(zip(records, keys))
+        if not key or last_index[key] == index
+    ]
+
+
+def process_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Index a list of DynamoDB Stream records.
     
     Args:
-        event: DynamoDB Stream event or manual invocation
-        context: Lambda context
+        records: DynamoDB Stream records (INSERT, MODIFY, REMOVE)
         
     Returns:
         Response with processing results
     """
-    logger.info(f"Received event with {len(event.get('Records', []))} records")
-    # logger.info(f"Event: {json.dumps(event, indent=2)}")
-
-    # Handle manual actions
-    action = event.get('action')
-    if action == 'initialize':
-        return handle_initialize()
-    elif action == 'delete_all_products':
-        return handle_delete_all_products()
-    elif action == 'delete_collection':
-        return handle_delete_collection()
-    
-    # Process stream records
-    processed = 0
+    # Process stream records. INSERT/MODIFY records are collected, their products
+    # fetched concurrently, and indexed in batches (one embedding batch and one
+    # Qdrant upsert); pending records are flushed before a REMOVE so stream
+    # order is preserved.
+    # Superseded events for the same product count as processed
+    coalesced = coalesce_records(records)
+    processed = len(records) - len(coalesced)
     failed = 0
     errors = []
+    pending: List[Dict[str, Any]] = []
+    if processed:
+        logger.info(f"Coalesced {processed} superseded records for repeated products")
+    
+    def flush() -> None:
+        nonlocal processed, failed
+        products: List[PreparedProduct] = []
+        for outcome in prepare_records(pending):
+            if isinstance(outcome, Exception):
+                failed += 1
+                error_msg = f"Error processing record: {str(outcome)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+            elif outcome:
+                products.append(outcome)
+            else:
+                processed += 1
+        pending.clear()
+        
+        flushed, flush_failed, flush_errors = _flush_pending(products)
+        processed += flushed
+        failed += flush_failed
+        errors.extend(flush_errors)
     
     try:
-        for record in event.get('Records', []):
+        for record in coalesced:
             try:
                 event_name = record.get('eventName')
                 logger.info(f"Processing event: {event_name}")
                 
                 if event_name in ['INSERT', 'MODIFY']:
-                    process_insert_or_modify(record)
-                    processed += 1
+                    pending.append(record)
                     
                 elif event_name == 'REMOVE':
+                    flush()
                     process_remove(record)
                     processed += 1
                     
@@ -305,6 +477,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 logger.error(error_msg, exc_info=True)
                 errors.append(error_msg)
         
+        flush()
+        
         response = {
             'statusCode': 200 if failed == 0 else 207,
             'body': json.dumps({
@@ -329,3 +503,99 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             })
         }
 
+
+def handle_bulk_reindex(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Handle a bulk reindex request: index the event's stream-format Records with
+    HNSW indexing paused, so Qdrant builds the index once instead of per upsert.
+    
+    Set `resumeIndexing` to false on all but the last page of a multi-invocation
+    reindex to keep indexing paused between pages.
+    
+    Args:
+        event: {"action": "bulk_reindex", "Records": [...], "resumeIndexing": bool}
+        
+    Returns:
+        Response with processing results
+    """
+    qdrant = get_qdrant_manager()
+    qdrant.pause_indexing()
+    try:
+        return process_records(event.get('Records', []))
+    finally:
+        if event.get('resumeIndexing', True):
+            qdrant.resume_indexing()
+
+
+def stream_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for DynamoDB Stream events (the stream-triggered function).
+    
+    Args:
+        event: DynamoDB Stream event
+        context: Lambda context
+        
+    Returns:
+        Response with processing results
+    """
+    records = event.get('Records') or []
+    logger.info(f"Received event with {len(records)} records")
+    
+    if not records:
+        return {
+            'statusCode': 200,
+            'body': json.dumps({'message': 'No records to process', 'processed': 0, 'failed': 0, 'errors': []})
+        }
+    
+    return process_records(records)
+
+
+def admin_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda handler for manual indexer actions (invoked directly, never by the stream).
+    
+    Supported actions: initialize, delete_all_products, delete_collection, bulk_reindex.
+    
+    Args:
+        event: Manual invocation payload with an `action` key
+        context: Lambda context
+        
+    Returns:
+        Response with the action's results
+    """
+    action = event.get('action')
+    logger.info(f"Received admin action: {action}")
+    
+    if action == 'initialize':
+        return handle_initialize()
+    elif action == 'delete_all_products':
+        return handle_delete_all_products()
+    elif action == 'delete_collection':
+        return handle_delete_collection()
+    elif action == 'bulk_reindex':
+        return handle_bulk_reindex(event)
+    
+    return {
+        'statusCode': 400,
+        'body': json.dumps({'error': f'Unknown action: {action}'})
+    }
+
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Combined Lambda handler for stream events and manual actions.
+    
+    Kept for deployments that point one function at both; the deployed functions
+    use stream_handler and admin_handler directly.
+    
+    Args:
+        event: DynamoDB Stream event or manual invocation
+        context: Lambda context
+        
+    Returns:
+        Response with processing results
+    """
+    if event.get('action'):
+        return admin_handler(event, context)
+    
+    return stream_handler(event, context)
@@ -6,7 +6,9 @@ import os
 import sys
 import logging
 import uuid
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 
 # Ensure Lambda layer site-packages (/opt/python) is on sys.path
 LAYER_SITE_DIR = "/opt/python"
@@ -14,13 +16,24 @@ if os.path.isdir(LAYER_SITE_DIR) and LAYER_SITE_DIR not in sys.path:
     sys.path.append(LAYER_SITE_DIR)
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+)
 from qdrant_client.http.models import (
     Filter as HttpFilter,
     FieldCondition as HttpFieldCondition,
+    HasIdCondition,
     MatchValue as HttpMatchValue,
     MatchText as HttpMatchText,
     MinShould,
+    OptimizersConfigDiff,
+    OverwritePayloadOperation,
+    SetPayload,
     TextIndexParams,
     TokenizerType,
 )
@@ -31,6 +44,35 @@ from shared.qdrant_types import ProductMetadata
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
+# Batch upserts are split into requests of this many points, sent this many at a time
+UPSERT_BATCH_SIZE = int(os.getenv('QDRANT_UPSERT_BATCH_SIZE', '64'))
+UPSERT_PARALLEL = int(os.getenv('QDRANT_UPSERT_PARALLEL', '2'))
+
+# Optimizer indexing threshold (KB of vectors per segment before HNSW is built)
+# restored after a bulk reindex when the collection's own value is unknown
+# (Qdrant's default is 10000)
+DEFAULT_INDEXING_THRESHOLD = int(os.getenv('QDRANT_INDEXING_THRESHOLD', '10000'))
+
+# Talk to Qdrant over gRPC (protobuf-encoded vectors, HTTP/2) instead of REST
+QDRANT_PREFER_GRPC = os.getenv('QDRANT_PREFER_GRPC', 'true').lower() == 'true'
+QDRANT_GRPC_PORT = int(os.getenv('QDRANT_GRPC_PORT', '6334'))
+
+# REST transport only: keep-alive pool shared by concurrent upserts, kept warm
+# between invocations (httpx defaults to 5s idle expiry)
+QDRANT_KEEPALIVE_CONNECTIONS = 20
+QDRANT_KEEPALIVE_EXPIRY = 60.0
+
+# Create new collections with int8 scalar quantization: quantized vectors stay
+# in RAM, the original float32 vectors move to disk (used only for rescoring)
+QDRANT_QUANTIZATION = os.getenv('QDRANT_QUANTIZATION', 'true').lower() == 'true'
+
+# Collections already checked/created in this container (every QdrantManager
+# in the process shares it, so warm invocations skip the round-trips)
+_verified_collections = set()
+
+# Indexing threshold each collection had before pause_indexing() set it to 0
+_paused_indexing_thresholds: Dict[str, int] = {}
+
 
 class QdrantManager:
     """
@@ -47,59 +89,111 @@ class QdrantManager:
         if not self.url or not self.api_key:
             raise ValueError("QDRANT_URL and QDRANT_API_KEY must be set")
         
-        # Initialize client
+        # Initialize client (REST calls in this module are transparently sent
+        # over gRPC when prefer_grpc is set)
+        rest_options: Dict[str, Any] = {}
+        if not QDRANT_PREFER_GRPC:
+            # Extra kwargs are passed to qdrant-client's httpx client
+            import httpx
+            rest_options = {
+                'http2': True,
+                'limits': httpx.Limits(
+                    max_keepalive_connections=QDRANT_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=QDRANT_KEEPALIVE_EXPIRY
+                ),
+            }
+        
         self.client = QdrantClient(
             url=self.url,
             api_key=self.api_key,
-            timeout=30
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_port=QDRANT_GRPC_PORT,
+            timeout=30,
+            **rest_options
         )
         
-        logger.info(f"Qdrant client initialized for collection: {self.collection_name}")
+        transport = 'gRPC' if QDRANT_PREFER_GRPC else 'REST'
+        logger.info(f"Qdrant client initialized ({transport}) for collection: {self.collection_name}")
         # Ensure the collection and text indexes exist so search filters work
         self.ensure_collection_exists()
     
-    def ensure_collection_exists(self) -> bool:
+    def ensure_collection_exists(self, force: bool = False) -> bool:
         """
         Create collection if it doesn't exist.
         
+        The check runs once per container; later calls return immediately
+        unless force is set.
+        
+        Args:
+            force: Check Qdrant even if this container already verified the collection
+        
         Returns:
             bool: True if collection was created, False if already exists
         """
+        if not force and self.collection_name in _verified_collections:
+            return False
+        
         try:
-            # Check if collection exists
-            collections = self.client.get_collections().collections
-            exists = any(c.name == self.collection_name for c in collections)
+            # Check if collection exists (its info also carries the payload
+            # schema, so the index check below needs no extra request)
+            try:
+                collection_info = self.client.get_collection(self.collection_name)
+            except Exception:
+                collection_info = None
             
-            if exists:
+            if collection_info is not None:
                 logger.info(f"Collection {self.collection_name} already exists")
                 # Even if the collection exists, make sure payload indexes are present
-                self.ensure_text_indexes()
+                self.ensure_text_indexes(collection_info)
+                _verified_collections.add(self.collection_name)
                 return False
             
             # Create collection
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.vector_size,
-                    distance=Distance.COSINE
+            if QDRANT_QUANTIZATION:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=VectorParams(
+                        size=self.vector_size,
+                        distance=Distance.COSINE,
+                        on_disk=True
+                    ),
+                    quantization_config=ScalarQuantization(
+                        scalar=ScalarQuantizationConfig(
+                            type=ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True
+                        )
+                    )
+                )
+            else:
+                self.client.create_collection(
+                    collection_name=self.collection_name,
+                    vectors_config=VectorParams(
+                        size=self.vector_size,
+                        distance=Distance.COSINE
+                    )
                 )
-            )
             
-            logger.info(f"Created collection {self.collection_name}")
+            logger.info(f"Created collection {self.collection_name} (int8 quantization: {QDRANT_QUANTIZATION})")
             # Create text indexes needed for hybrid / filtered search
             self.ensure_text_indexes()
+            _verified_collections.add(self.collection_name)
             return True
             
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {str(e)}")
             raise
 
-    def ensure_text_indexes(self) -> None:
+    def ensure_text_indexes(self, collection_info: Any = None) -> None:
         """
         Ensure payload indexes exist for hybrid search fields.
         
         - `searchText` / `orderingNumber`: full-text search
         - `productCategory`: keyword (exact match) filter
+        - `prefixes`: keyword filter for autocomplete prefix lookups
+        
+        Args:
+            collection_info: Already-fetched collection info (fetched if omitted)
         """
         # Configuration for TEXT indices on payload fields.
         # NOTE: This client version supports only `type="text"` for TextIndexParams.
@@ -112,7 +206,8 @@ class QdrantManager:
         }
 
         try:
-            collection_info = self.client.get_collection(self.collection_name)
+            if collection_info is None:
+                collection_info = self.client.get_collection(self.collection_name)
             existing_schema = getattr(collection_info, "payload_schema", {}) or {}
         except Exception as e:
             logger.warning(f"Could not fetch collection info for indexes: {str(e)}")
@@ -143,35 +238,56 @@ class QdrantManager:
                     logger.warning(f"Could not create TEXT payload index for '{field}': {str(e)}")
 
         # 2) Ensure KEYWORD index for productCategory (used with MatchValue filters)
-        try:
-            # If an index exists but is not of keyword type, we recreate it.
-            if existing_schema and "productCategory" in existing_schema:
-                try:
-                    self.client.delete_payload_index(
-                        collection_name=self.collection_name,
-                        field_name="productCategory",
-                    )
-                    logger.info("Deleted existing index for 'productCategory' to recreate as KEYWORD")
-                except Exception as e:
-                    logger.warning(f"Could not delete existing index for 'productCategory': {str(e)}")
+        category_index = existing_schema.get("productCategory") if existing_schema else None
+        category_type = getattr(category_index, "data_type", None)
+        if getattr(category_type, "value", category_type) != "keyword":
+            try:
+                # If an index exists but is not of keyword type, we recreate it.
+                if category_index is not None:
+                    try:
+                        self.client.delete_payload_index(
+                            collection_name=self.collection_name,
+                            field_name="productCategory",
+                        )
+                        logger.info("Deleted existing index for 'productCategory' to recreate as KEYWORD")
+                    except Exception as e:
+                        logger.warning(f"Could not delete existing index for 'productCategory': {str(e)}")
 
-            self.client.create_payload_index(
-                collection_name=self.collection_name,
-                field_name="productCategory",
-                field_schema="keyword",
-            )
-            logger.info("Created KEYWORD payload index for field 'productCategory'")
-        except Exception as e:
-            if "already exists" in str(e).lower():
-                logger.info("Payload index for field 'productCategory' already exists")
-            else:
-                logger.warning(f"Could not create KEYWORD payload index for 'productCategory': {str(e)}")
-    
-    def _build_point_id(self, ordering_number: str) -> str:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name="productCategory",
+                    field_schema="keyword",
+                )
+                logger.info("Created KEYWORD payload index for field 'productCategory'")
+            except Exception as e:
+                if "already exists" in str(e).lower():
+                    logger.info("Payload index for field 'productCategory' already exists")
+                else:
+                    logger.warning(f"Could not create KEYWORD payload index for 'productCategory': {str(e)}")
+
+        # 3) Ensure KEYWORD index for prefixes (autocomplete fast path via MatchValue)
+        if not (existing_schema and "prefixes" in existing_schema):
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name="prefixes",
+                    field_schema="keyword",
+                )
+                logger.info("Created KEYWORD payload index for field 'prefixes'")
+            except Exception as e:
+                if "already exists" in str(e).lower():
+                    logger.info("Payload index for field 'prefixes' already exists")
+                else:
+                    logger.warning(f"Could not create KEYWORD payload index for 'prefixes': {str(e)}")
+
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _build_point_id(ordering_number: str) -> str:
         """
         Build a deterministic UUID for a product based on its ordering number.
         Using uuid5 keeps the point id stable across upserts/deletes without
-        storing an extra mapping.
+        storing an extra mapping. Memoized per container, since stream batches
+        keep re-seeing the same ordering numbers.
         """
         return str(uuid.uuid5(uuid.NAMESPACE_URL, f"products:{ordering_number}"))
 
@@ -218,6 +334,10 @@ class QdrantManager:
         """
         Batch upsert multiple products.
         
+        Points are sent in requests of UPSERT_BATCH_SIZE, up to UPSERT_PARALLEL
+        requests at a time, so large batches neither build one huge request body
+        nor wait on each round-trip in turn.
+        
         Args:
             products: List of dicts with 'id', 'vector', and 'metadata' keys
             
@@ -233,11 +353,22 @@ class QdrantManager:
                 )
                 for p in products
             ]
+            batch_size = max(1, UPSERT_BATCH_SIZE)
+            batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
             
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=points
-            )
+            def upsert_batch(batch: List[PointStruct]) -> None:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=batch
+                )
+            
+            if len(batches) <= 1 or UPSERT_PARALLEL <= 1:
+                for batch in batches:
+                    upsert_batch(batch)
+            else:
+                with ThreadPoolExecutor(max_workers=min(UPSERT_PARALLEL, len(batches))) as executor:
+                    # list() re-raises the first failed batch
+                    list(executor.map(upsert_batch, batches))
             
             logger.info(f"Batch upserted {len(products)} products to Qdrant")
             return True
@@ -246,6 +377,42 @@ class QdrantManager:
             logger.error(f"Error batch upserting products: {str(e)}")
             raise
     
+    def batch_overwrite_payloads(
+        self,
+        payloads: List[Tuple[str, Dict[str, Any]]]
+    ) -> bool:
+        """
+        Replace the payload of existing points, leaving their vectors untouched.
+        
+        Used for products whose searchable text is unchanged, so their vectors
+        are neither downloaded nor uploaded again. Operations are sent in
+        requests of UPSERT_BATCH_SIZE points.
+        
+        Args:
+            payloads: (point ID, full payload) pairs
+            
+        Returns:
+            bool: True if successful
+        """
+        try:
+            operations = [
+                OverwritePayloadOperation(overwrite_payload=SetPayload(payload=payload, points=[point_id]))
+                for point_id, payload in payloads
+            ]
+            batch_size = max(1, UPSERT_BATCH_SIZE)
+            for i in range(0, len(operations), batch_size):
+                self.client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=operations[i:i + batch_size]
+                )
+            
+            logger.info(f"Updated payload of {len(payloads)} products in Qdrant")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating product payloads: {str(e)}")
+            raise
+    
     def delete_product(self, ordering_number: str) -> bool:
         """
         Delete a product from Qdrant.
@@ -267,6 +434,104 @@ class QdrantManager:
             logger.error(f"Error deleting product {ordering_number}: {str(e)}")
             raise
     
+    def _build_search_filter(
+        self,
+        category_filter: Optional[str] = None,
+        text_query: Optional[str] = None,
+        point_ids: Optional[List[str]] = None
+    ) -> Optional[HttpFilter]:
+        """
+        Build the payload filter shared by vector and text-only queries.
+        
+        When `point_ids` is given it replaces the text conditions, since the
+        ids were already resolved from the same text match.
+        """
+        must_conditions: List[Any] = []
+        should_conditions: List[HttpFieldCondition] = []
+
+        # Category filter (payload key: productCategory)
+        if category_filter:
+            must_conditions.append(
+                HttpFieldCondition(
+                    key="productCategory",
+                    match=HttpMatchValue(value=category_filter)
+                )
+            )
+
+        if point_ids is not None:
+            must_conditions.append(HasIdCondition(has_id=point_ids))
+
+        # Hybrid text match across searchText and orderingNumber.
+        # For very short queries (e.g. 1-char like "6"), text indexing/tokenization
+        # is often too restrictive, so we skip text filters and rely on vector
+        # similarity + category filtering instead to still return options.
+        elif text_query and text_query.strip():
+            text_query_lower = text_query.lower().strip()
+            if len(text_query_lower) >= 2:
+                should_conditions.extend([
+                    HttpFieldCondition(
+                        key="searchText",
+                        match=HttpMatchText(text=text_query_lower)
+                    ),
+                    HttpFieldCondition(
+                        key="orderingNumber",
+                        match=HttpMatchText(text=text_query_lower)
+                    ),
+                ])
+            else:
+                logger.info(
+                    "Skipping text MatchText filters for very short query '%s'; "
+                    "using vector + category filtering only",
+                    text_query_lower,
+                )
+
+        if not must_conditions and not should_conditions:
+            return None
+
+        min_should = (
+            MinShould(conditions=should_conditions, min_count=1)
+            if should_conditions
+            else None
+        )
+        return HttpFilter(
+            must=must_conditions if must_conditions else None,
+            should=should_conditions if should_conditions else None,
+            min_should=min_should
+        )
+
+    def text_match_point_ids(
+        self,
+        collection_name: str,
+        text_query: str,
+        category_filter: Optional[str] = None,
+        max_candidates: int = 256
+    ) -> Optional[List[str]]:
+        """
+        Resolve the ids of points matching the hybrid text filter, without a vector.
+        
+        Runs while the query embedding is still being generated, so the
+        following vector query can filter on ids instead of re-evaluating
+        MatchText.
+        
+        Returns:
+            List of point ids, or None if the text filter does not apply or
+            the candidate set is larger than `max_candidates`
+        """
+        query_filter = self._build_search_filter(category_filter, text_query)
+        if query_filter is None or not query_filter.should:
+            return None
+
+        points, next_offset = self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=query_filter,
+            limit=max_candidates,
+            with_payload=False,
+            with_vectors=False
+        )
+        if next_offset is not None:
+            return None
+        return [str(point.id) for point in points]
+
     def query_points(
         self,
         collection_name: str,
@@ -274,7 +539,8 @@ class QdrantManager:
         limit: int = 30,
         category_filter: Optional[str] = None,
         text_query: Optional[str] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        point_ids: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         """
         Query points using the query_points API with proper filtering and hybrid search support.
@@ -283,57 +549,10 @@ class QdrantManager:
         - Vector similarity search
         - Category filtering on `productCategory`
         - Text-based matching on `searchText` and `orderingNumber`
+        - Restricting to pre-resolved text match ids (`point_ids`)
         """
         try:
-            # Build filter
-            must_conditions: List[HttpFieldCondition] = []
-            should_conditions: List[HttpFieldCondition] = []
-
-            # Category filter (payload key: productCategory)
-            if category_filter:
-                must_conditions.append(
-                    HttpFieldCondition(
-                        key="productCategory",
-                        match=HttpMatchValue(value=category_filter)
-                    )
-                )
-
-            # Hybrid text match across searchText and orderingNumber.
-            # For very short queries (e.g. 1-char like "6"), text indexing/tokenization
-            # is often too restrictive, so we skip text filters and rely on vector
-            # similarity + category filtering instead to still return options.
-            if text_query and text_query.strip():
-                text_query_lower = text_query.lower().strip()
-                if len(text_query_lower) >= 2:
-                    should_conditions.extend([
-                        HttpFieldCondition(
-                            key="searchText",
-                            match=HttpMatchText(text=text_query_lower)
-                        ),
-                        HttpFieldCondition(
-                            key="orderingNumber",
-                            match=HttpMatchText(text=text_query_lower)
-                        ),
-                    ])
-                else:
-                    logger.info(
-                        "Skipping text MatchText filters for very short query '%s'; "
-                        "using vector + category filtering only",
-                        text_query_lower,
-                    )
-
-            query_filter = None
-            if must_conditions or should_conditions:
-                min_should = (
-                    MinShould(conditions=should_conditions, min_count=1)
-                    if should_conditions
-                    else None
-                )
-                query_filter = HttpFilter(
-                    must=must_conditions if must_conditions else None,
-                    should=should_conditions if should_conditions else None,
-                    min_should=min_should
-                )
+            query_filter = self._build_search_filter(category_filter, text_query, point_ids)
 
             # Execute query_points with filter as per user example
             results = self.client.query_points(
@@ -360,6 +579,37 @@ class QdrantManager:
             logger.error(f"Error querying Qdrant: {str(e)}", exc_info=True)
             raise
     
+    def get_search_text_hashes(self, point_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch the stored searchTextHash of existing points (without vectors).
+        
+        Args:
+            point_ids: Point IDs to look up (missing points are ignored)
+            
+        Returns:
+            Mapping of point ID to searchTextHash for points that have one;
+            empty if the lookup fails
+        """
+        if not point_ids:
+            return {}
+        
+        try:
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=point_ids,
+                with_payload=["searchTextHash"],
+                with_vectors=False
+            )
+        except Exception as e:
+            logger.warning(f"Could not fetch stored search text hashes: {str(e)}")
+            return {}
+        
+        return {
+            str(point.id): point.payload["searchTextHash"]
+            for point in points
+            if point.payload and point.payload.get("searchTextHash")
+        }
+    
     def get_product(self, product_id: str) -> Optional[Dict[str, Any]]:
         """
         Retrieve a specific product by ID.
@@ -457,6 +707,7 @@ class QdrantManager:
         """
         try:
             self.client.delete_collection(collection_name=self.collection_name)
+            _verified_collections.discard(self.collection_name)
             logger.info(f"Successfully deleted collection {self.collection_name}")
             return True
             
@@ -464,6 +715,54 @@ class QdrantManager:
             logger.error(f"Error deleting collection: {str(e)}")
             raise
     
+    def pause_indexing(self) -> None:
+        """
+        Stop HNSW index building (indexing_threshold=0) ahead of a bulk upsert.
+        
+        Points stay searchable (by full scan of unindexed segments) while paused;
+        call resume_indexing() afterwards so the index is built once at the end.
+        The collection's current threshold is kept for resume_indexing(); a
+        collection that is already paused (0) keeps the earlier saved value.
+        """
+        try:
+            info = self.client.get_collection(self.collection_name)
+            threshold = info.config.optimizer_config.indexing_threshold
+            if threshold:
+                _paused_indexing_thresholds[self.collection_name] = threshold
+            
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=0)
+            )
+            logger.info(f"Paused HNSW indexing for collection {self.collection_name}")
+        except Exception as e:
+            logger.error(f"Error pausing indexing: {str(e)}")
+            raise
+    
+    def resume_indexing(self) -> None:
+        """
+        Restore the indexing threshold so Qdrant builds the HNSW index.
+        
+        Uses the value saved by pause_indexing() in this container, or
+        DEFAULT_INDEXING_THRESHOLD when the pause happened elsewhere (e.g. an
+        earlier page of a multi-invocation reindex on another container).
+        """
+        try:
+            threshold = _paused_indexing_thresholds.pop(
+                self.collection_name, DEFAULT_INDEXING_THRESHOLD
+            )
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold)
+            )
+            logger.info(
+                f"Resumed HNSW indexing for collection {self.collection_name} "
+                f"(indexing_threshold={threshold})"
+            )
+        except Exception as e:
+            logger.error(f"Error resuming indexing: {str(e)}")
+            raise
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """Get collection information and stats."""
         try:
@@ -3,10 +3,34 @@ Data transformation utilities for indexing pipeline.
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+# Longest orderingNumber prefix stored in the payload for autocomplete lookups.
+# Longer prefixes fall back to the client-side scoring path in SearchService.
+AUTOCOMPLETE_PREFIX_MAX_LENGTH = 8
+
+
+def build_ordering_number_prefixes(
+    ordering_number: str,
+    max_length: int = AUTOCOMPLETE_PREFIX_MAX_LENGTH
+) -> List[str]:
+    """
+    Build the lowercased prefixes of an ordering number for autocomplete.
+    
+    Example: "6L-LD8" -> ["6", "6l", "6l-", "6l-l", "6l-ld", "6l-ld8"]
+    
+    Args:
+        ordering_number: Product ordering number
+        max_length: Maximum prefix length to store
+        
+    Returns:
+        List of prefixes (shortest first), empty if no ordering number
+    """
+    normalized = (ordering_number or "").strip().lower()
+    return [normalized[:i] for i in range(1, min(len(normalized), max_length) + 1)]
+
 
 def prepare_product_metadata(product_data: Dict[str, Any]) -> Dict[str, Any]:
     """
@@ -18,10 +42,11 @@ def prepare_product_metadata(product_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Metadata dict optimized for search and filtering
     """
+    ordering_number = product_data.get("orderingNumber", "")
     return {
-        "orderingNumber": product_data.get("orderingNumber", ""),
+        "orderingNumber": ordering_number,
         "productCategory": product_data.get("productCategory", product_data.get("category", "")),
-        
+        "prefixes": build_ordering_number_prefixes(ordering_number),
     }
 
 
@@ -10,7 +10,7 @@ from typing import Dict, Any
 CURRENT_DIR = os.path.dirname(__file__)
 SERVICE_ROOT = os.path.abspath(os.path.join(CURRENT_DIR, ".."))
 SHARED_DIR = os.path.abspath(os.path.join(SERVICE_ROOT, "..", "shared"))
-if SHARED_DIR not in sys.path:
+if SHARED_DIR not in sys.path and os.path.isdir(SHARED_DIR):
     sys.path.append(SHARED_DIR)
 
 from shared.product_types import ProductRecord, decode_dynamo_image  # noqa: E402
@@ -2,15 +2,12 @@
 Email draft endpoint handler.
 """
 
-import os
 import logging
 from typing import Dict, Any
 
 from api.utils import get_path_parameter, get_request_body, create_response
-from services.email_service import generate_email_draft, send_email_with_attachments
 
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 
 def handle_email_draft(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -29,7 +26,9 @@ def handle_email_draft(event: Dict[str, Any]) -> Dict[str, Any]:
         body = get_request_body(event)
         customer_email = body.get('customer_email')
         
-        # Generate email draft
+        # Generate email draft (email_service creates its S3 and SES clients at
+        # import, so it is only loaded by the email endpoints)
+        from services.email_service import generate_email_draft
         email_draft = generate_email_draft(quotation_id, customer_email)
         
         if not email_draft:
@@ -63,6 +62,7 @@ def handle_send_email(event: Dict[str, Any]) -> Dict[str, Any]:
         sender_name = body.get('sender_name')
         
         # Send email with attachments
+        from services.email_service import send_email_with_attachments
         result = send_email_with_attachments(
             quotation_id=quotation_id,
             customer_email=customer_email,
@@ -2,21 +2,22 @@
 Export endpoint handlers.
 """
 
-import os
 import logging
-import base64
 import re
+from io import BytesIO
 from typing import Dict, Any
+from urllib.parse import quote
 
-from api.utils import get_path_parameter, create_response
-from services.export_service import (
-    export_stock_check,
-    export_priority_import
-)
+from api.utils import get_path_parameter, create_response, b64encode_ascii
 from services.quotation_service import get_quotation
 
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Runs of invalid filename chars (< > : " / \ | ? *), whitespace and underscores,
+# each replaced by a single underscore in one pass
+_FILENAME_SEPARATORS_RE = re.compile(r'[<>:"/\\|?*\s_]+')
 
 
 def sanitize_filename(text: str) -> str:
@@ -26,11 +27,13 @@ def sanitize_filename(text: str) -> str:
     """
     if not text:
         return ''
-    # Replace invalid filename characters with underscores
-    # Invalid chars: < > : " / \ | ? *
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', text)
-    # Replace multiple spaces/underscores with single underscore
-    sanitized = re.sub(r'[\s_]+', '_', sanitized)
+    # Fast path for plain ASCII names (letters, digits and spaces): only the
+    # space runs need replacing, which split/join does without the regex
+    if text.isascii() and text.replace(' ', '').isalnum():
+        return '_'.join(text.split())[:100]
+    # Replace invalid filename characters and runs of spaces/underscores
+    # with a single underscore
+    sanitized = _FILENAME_SEPARATORS_RE.sub('_', text)
     # Remove leading/trailing underscores
     sanitized = sanitized.strip('_')
     # Limit length to avoid filesystem issues
@@ -72,10 +75,75 @@ def generate_export_filename(quotation: Dict[str, Any], export_type: str) -> str
     return filename
 
 
+def content_disposition(filename: str) -> str:
+    """
+    Build an attachment Content-Disposition header for a download.
+    
+    Header values must be ASCII, but quotation and customer names often are
+    not, so the full name goes in the RFC 6266 `filename*` (UTF-8,
+    percent-encoded) with an ASCII-only `filename` fallback.
+    """
+    ascii_filename = filename.encode('ascii', 'replace').decode('ascii').replace('?', '_')
+    return f"attachment; filename=\"{ascii_filename}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def wants_binary_response(event: Dict[str, Any]) -> bool:
+    """
+    Check whether the client asked for the raw Excel file instead of JSON.
+    
+    Clients opt in by sending `Accept: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet`;
+    other requests keep the JSON (base64 `data`) response.
+    """
+    headers = event.get('headers') or {}
+    accept = next((v for k, v in headers.items() if k.lower() == 'accept'), '') or ''
+    return XLSX_CONTENT_TYPE in accept
+
+
+def create_export_response(
+    event: Dict[str, Any],
+    excel_data: BytesIO,
+    filename: str,
+    export_type: str
+) -> Dict[str, Any]:
+    """
+    Build the response for a generated export.
+    
+    Binary responses carry the file itself (API Gateway decodes the body, so
+    the client receives raw XLSX bytes with a Content-Disposition filename);
+    JSON responses wrap the base64-encoded file with its metadata.
+    """
+    binary = wants_binary_response(event)
+    
+    # Encode straight from the BytesIO buffer (getbuffer() avoids copying the
+    # file), then release the workbook before building the response
+    excel_base64 = b64encode_ascii(excel_data.getbuffer())
+    excel_data.close()
+    
+    if binary:
+        return create_response(
+            200,
+            excel_base64,
+            headers={
+                'Content-Type': XLSX_CONTENT_TYPE,
+                'Content-Disposition': content_disposition(filename)
+            },
+            binary=True
+        )
+    
+    # Return file data with metadata
+    return create_response(200, {
+        'filename': filename,
+        'content_type': XLSX_CONTENT_TYPE,
+        'data': excel_base64,
+        'export_type': export_type
+    })
+
+
 def handle_export_stock_check(event: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handle POST /quotations/{quotationId}/exports/stock-check - Generate stock check Excel.
-    Returns Excel file as base64-encoded string for direct download.
+    Returns Excel file as base64-encoded string for direct download, or the raw
+    file when the client accepts the XLSX content type.
     """
     try:
         quotation_id = get_path_parameter(event, 'quotationId')
@@ -88,26 +156,15 @@ def handle_export_stock_check(event: Dict[str, Any]) -> Dict[str, Any]:
         if not quotation:
             return create_response(404, {'error': 'Quotation not found'})
         
-        # Generate export
-        excel_data = export_stock_check(quotation_id)
-        
-        if not excel_data:
-            return create_response(404, {'error': 'Quotation not found'})
-        
-        # Convert BytesIO to base64 for JSON response
-        excel_bytes = excel_data.getvalue()
-        excel_base64 = base64.b64encode(excel_bytes).decode('utf-8')
+        # Generate export (export_service pulls in openpyxl, so it is only
+        # imported by requests that build a workbook)
+        from services.export_service import export_stock_check
+        excel_data = export_stock_check(quotation_id, quotation=quotation)
         
         # Generate filename using quotation name and customer
         filename = generate_export_filename(quotation, 'stock-check')
         
-        # Return file data with metadata
-        return create_response(200, {
-            'filename': filename,
-            'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'data': excel_base64,
-            'export_type': 'stock-check'
-        })
+        return create_export_response(event, excel_data, filename, 'stock-check')
         
     except Exception as e:
         logger.error(f"Error exporting stock check: {str(e)}", exc_info=True)
@@ -117,7 +174,8 @@ def handle_export_stock_check(event: Dict[str, Any]) -> Dict[str, Any]:
 def handle_export_priority_import(event: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handle POST /quotations/{quotationId}/exports/priority-import - Generate priority import Excel.
-    Returns Excel file as base64-encoded string for direct download.
+    Returns Excel file as base64-encoded string for direct download, or the raw
+    file when the client accepts the XLSX content type.
     """
     try:
         quotation_id = get_path_parameter(event, 'quotationId')
@@ -131,25 +189,13 @@ def handle_export_priority_import(event: Dict[str, Any]) -> Dict[str, Any]:
             return create_response(404, {'error': 'Quotation not found'})
         
         # Generate export
-        excel_data = export_priority_import(quotation_id)
-        
-        if not excel_data:
-            return create_response(404, {'error': 'Quotation not found'})
-        
-        # Convert BytesIO to base64 for JSON response
-        excel_bytes = excel_data.getvalue()
-        excel_base64 = base64.b64encode(excel_bytes).decode('utf-8')
+        from services.export_service import export_priority_import
+        excel_data = export_priority_import(quotation_id, quotation=quotation)
         
         # Generate filename using quotation name and customer
         filename = generate_export_filename(quotation, 'priority-import')
         
-        # Return file data with metadata
-        return create_response(200, {
-            'filename': filename,
-            'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'data': excel_base64,
-            'export_type': 'priority-import'
-        })
+        return create_export_response(event, excel_data, filename, 'priority-import')
         
     except Exception as e:
         logger.error(f"Error exporting priority import: {str(e)}", exc_info=True)
@@ -180,27 +226,16 @@ def handle_get_export_download(event: Dict[str, Any]) -> Dict[str, Any]:
             return create_response(404, {'error': 'Quotation not found'})
         
         # Generate export on-demand
+        from services.export_service import export_stock_check, export_priority_import
         if export_type == 'stock-check':
-            excel_data = export_stock_check(quotation_id)
+            excel_data = export_stock_check(quotation_id, quotation=quotation)
         else:
-            excel_data = export_priority_import(quotation_id)
-        
-        if not excel_data:
-            return create_response(404, {'error': 'Quotation not found'})
+            excel_data = export_priority_import(quotation_id, quotation=quotation)
         
         # Generate filename using quotation name and customer
         filename = generate_export_filename(quotation, export_type)
         
-        # Convert to base64
-        excel_bytes = excel_data.getvalue()
-        excel_base64 = base64.b64encode(excel_bytes).decode('utf-8')
-        
-        return create_response(200, {
-            'filename': filename,
-            'content_type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'data': excel_base64,
-            'export_type': export_type
-        })
+        return create_export_response(event, excel_data, filename, export_type)
         
     except Exception as e:
         logger.error(f"Error getting export download: {str(e)}", exc_info=True)
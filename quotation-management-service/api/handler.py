@@ -2,10 +2,11 @@
 Main API handler - routes requests to appropriate endpoint handlers.
 """
 
-import os
+import re
 import logging
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional, Pattern, Tuple
 
+from api.logging_config import configure_logging
 from api.utils import handle_cors_preflight, verify_auth, create_response
 from api.quotations import (
     handle_create_quotation,
@@ -32,8 +33,122 @@ from api.exports import (
 from api.email import handle_email_draft, handle_send_email
 
 # Configure logging
+configure_logging()
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+# Header spellings checked when logging whether an API key was sent
+API_KEY_HEADERS = ('x-api-key', 'X-Api-Key', 'X-API-Key')
+
+def _auth_headers_present(headers: Dict[str, Any]) -> Tuple[bool, bool]:
+    """Return whether the request carries an API key header and an Authorization header."""
+    api_key_present = any(h in headers for h in API_KEY_HEADERS)
+    auth_header_present = any(k.lower() == 'authorization' for k in headers)
+    return api_key_present, auth_header_present
+
+
+RouteHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# (method, route) pairs, as declared in serverless.yml
+ROUTES = [
+    # Quotation Management
+    ('POST', '/quotations', handle_create_quotation),
+    ('GET', '/quotations', handle_get_quotations),
+    ('GET', '/quotations/{quotationId}', handle_get_quotation),
+    ('PUT', '/quotations/{quotationId}', handle_update_quotation),
+    ('PATCH', '/quotations/{quotationId}/status', handle_update_status),
+    ('PUT', '/quotations/{quotationId}/full-state', handle_replace_quotation_state),
+    ('DELETE', '/quotations/{quotationId}', handle_delete_quotation),
+    # Line Items
+    ('POST', '/quotations/{quotationId}/lines', handle_add_line),
+    ('PUT', '/quotations/{quotationId}/lines/{lineId}', handle_update_line),
+    ('DELETE', '/quotations/{quotationId}/lines/{lineId}', handle_delete_line),
+    ('POST', '/quotations/{quotationId}/lines/batch', handle_batch_add_lines),
+    ('PATCH', '/quotations/{quotationId}/lines/apply-margin', handle_apply_margin),
+    ('POST', '/quotations/{quotationId}/lines/refresh-prices', handle_refresh_prices),
+    # Exports
+    ('POST', '/quotations/{quotationId}/exports/stock-check', handle_export_stock_check),
+    ('POST', '/quotations/{quotationId}/exports/priority-import', handle_export_priority_import),
+    ('GET', '/quotations/{quotationId}/exports/{exportType}/download', handle_get_export_download),
+    # Email Draft
+    ('POST', '/quotations/{quotationId}/email-draft', handle_email_draft),
+    # Send Email
+    ('POST', '/quotations/{quotationId}/send-email', handle_send_email),
+]
+
+# Exact lookup by API Gateway routeKey (e.g. "GET /quotations/{quotationId}")
+ROUTE_KEYS: Dict[str, RouteHandler] = {f"{method} {route}": route_handler for method, route, route_handler in ROUTES}
+
+
+def _compile_method_routes() -> Dict[str, Tuple[Pattern, Dict[str, Tuple[RouteHandler, Dict[str, str]]]]]:
+    """
+    Build one regex per method matching any of its routes in a single fullmatch.
+    
+    Each route is a named group; routes with fewer parameters come first so a
+    literal segment (`/lines/batch`) wins over a parameter (`/lines/{lineId}`).
+    Path parameters are captured as nested groups, mapped back to their names.
+    """
+    routes_by_method: Dict[str, list] = {}
+    for method, route, route_handler in ROUTES:
+        routes_by_method.setdefault(method, []).append((route, route_handler))
+    
+    compiled = {}
+    for method, routes in routes_by_method.items():
+        routes.sort(key=lambda item: item[0].count('{'))
+        groups = []
+        handlers = {}
+        for index, (route, route_handler) in enumerate(routes):
+            name = f"r{index}"
+            params = {}
+            
+            def capture(param_match, name=name, params=params):
+                group = f"{name}_{len(params)}"
+                params[group] = param_match.group(1)
+                return f"(?P<{group}>[^/]+)"
+            
+            groups.append(f"(?P<{name}>{re.sub(r'{([^/]+)}', capture, route)})")
+            handlers[name] = (route_handler, params)
+        compiled[method] = (re.compile('|'.join(groups), re.IGNORECASE), handlers)
+    return compiled
+
+
+METHOD_ROUTES = _compile_method_routes()
+
+
+def resolve_route(
+    event: Dict[str, Any],
+    method: str,
+    path: str,
+    use_route_key: bool = True
+) -> Optional[RouteHandler]:
+    """
+    Find the handler for a request: by the routeKey API Gateway already matched,
+    else by matching the (normalized) path against the method's routes.
+    
+    Pass use_route_key=False when the path was rewritten (duplicate
+    /quotations prefix): API Gateway matched the raw path, so its routeKey
+    does not describe the normalized one (GET /quotations/quotations arrives
+    as GET /quotations/{quotationId} but must list quotations).
+    
+    On the path fallback, parameters captured by the match fill in
+    `pathParameters` if the event did not carry them.
+    """
+    if use_route_key:
+        route_handler = ROUTE_KEYS.get(event.get('routeKey') or '')
+        if route_handler:
+            return route_handler
+    
+    method_routes = METHOD_ROUTES.get(method)
+    if not method_routes:
+        return None
+    pattern, handlers = method_routes
+    match = pattern.fullmatch(path.rstrip('/') or '/')
+    if not match:
+        return None
+    route_handler, params = handlers[match.lastgroup]
+    if params and not event.get('pathParameters'):
+        event['pathParameters'] = {param: match.group(group) for group, param in params.items()}
+    return route_handler
+
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -60,21 +175,18 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     if path != original_path:
         logger.warning(f"[HANDLER] Normalized duplicate path from {original_path} to {path}")
     
-    logger.info(f"[HANDLER] Request method: {method}")
-    logger.info(f"[HANDLER] Request path: {path}")
-    
-    # Log headers for debugging (but mask sensitive values)
     headers = event.get('headers', {}) or {}
-    logger.info(f"[HANDLER] Headers present: {list(headers.keys())}")
     
-    # Check for API key in headers (log presence, not value)
-    api_key_headers = ['x-api-key', 'X-Api-Key', 'X-API-Key']
-    api_key_present = any(h in headers for h in api_key_headers)
-    logger.info(f"[HANDLER] API key header present: {api_key_present}")
-    
-    # Check for Authorization header
-    auth_header_present = any(k.lower() == 'authorization' for k in headers.keys())
-    logger.info(f"[HANDLER] Authorization header present: {auth_header_present}")
+    # Request diagnostics are only assembled when INFO logging is enabled
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[HANDLER] Request method: %s", method)
+        logger.info("[HANDLER] Request path: %s", path)
+        
+        # Log header names and auth header presence (never values)
+        api_key_present, auth_header_present = _auth_headers_present(headers)
+        logger.info("[HANDLER] Headers present: %s", list(headers))
+        logger.info("[HANDLER] API key header present: %s", api_key_present)
+        logger.info("[HANDLER] Authorization header present: %s", auth_header_present)
     
     # Handle CORS preflight
     cors_response = handle_cors_preflight(event)
@@ -82,87 +194,33 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         logger.info(f"[HANDLER] CORS preflight request, returning 200")
         return cors_response
     
+    # Resolve the route before authenticating so requests for unknown
+    # endpoints are rejected without paying for token verification
+    method = method.upper()
+    route_handler = resolve_route(event, method, path, use_route_key=path == original_path)
+    path = path.lower()
+    if not route_handler:
+        return create_response(404, {
+            'error': 'Not found',
+            'message': 'Invalid endpoint or method',
+            'path': path,
+            'method': method
+        })
+    
     # Verify authentication (Cognito token or API key)
     logger.info(f"[HANDLER] Verifying authentication...")
-    from api.utils import verify_auth
     auth_valid = verify_auth(event)
     logger.info(f"[HANDLER] Authentication verification result: {auth_valid}")
     
     if not auth_valid:
         logger.warning(f"[HANDLER] Authentication failed for {method} {path}")
         # Log more details about why it failed
+        api_key_present, auth_header_present = _auth_headers_present(headers)
         if not api_key_present and not auth_header_present:
             logger.warning(f"[HANDLER] No authentication headers found (neither API key nor Authorization)")
         elif auth_header_present and not api_key_present:
             logger.warning(f"[HANDLER] Authorization header present but token validation failed")
         return create_response(401, {'error': 'Unauthorized', 'message': 'Invalid or missing authentication'})
     
-    # Route based on normalized path and method (use already normalized path)
-    path = path.lower()
-    method = method.upper()
-    
-    # Quotation Management
-    if path == '/quotations' and method == 'POST':
-        return handle_create_quotation(event)
-
-    elif path == '/quotations' and method == 'GET':
-        return handle_get_quotations(event)
-
-    elif path.startswith('/quotations/') and method == 'GET':
-        return handle_get_quotation(event)
-
-    elif path.startswith('/quotations/') and path.endswith('/status') and method == 'PATCH':
-        return handle_update_status(event)
-
-    elif path.startswith('/quotations/') and path.endswith('/full-state') and method == 'PUT':
-        return handle_replace_quotation_state(event)
-
-    elif path.startswith('/quotations/') and not any(x in path for x in ['/lines', '/exports', '/email-draft', '/full-state']) and method == 'PUT':
-        return handle_update_quotation(event)
-    
-    elif path.startswith('/quotations/') and not any(x in path for x in ['/lines', '/exports', '/email-draft']) and method == 'DELETE':
-        return handle_delete_quotation(event)
-    
-    # Line Items
-    elif path.endswith('/lines/batch') and method == 'POST':
-        return handle_batch_add_lines(event)
-
-    elif path.endswith('/lines/apply-margin') and method == 'PATCH':
-        return handle_apply_margin(event)
-
-    elif path.endswith('/lines/refresh-prices') and method == 'POST':
-        return handle_refresh_prices(event)
-
-    elif '/lines/' in path and method == 'PUT':
-        return handle_update_line(event)
-
-    elif '/lines/' in path and method == 'DELETE':
-        return handle_delete_line(event)
-        
-    elif path.endswith('/lines') and method == 'POST':
-        return handle_add_line(event)
-    
-    # Exports
-    elif path.endswith('/exports/stock-check') and method == 'POST':
-        return handle_export_stock_check(event)
-    elif path.endswith('/exports/priority-import') and method == 'POST':
-        return handle_export_priority_import(event)
-    elif '/exports/' in path and '/download' in path and method == 'GET':
-        return handle_get_export_download(event)
-    
-    # Email Draft
-    elif path.endswith('/email-draft') and method == 'POST':
-        return handle_email_draft(event)
-    
-    # Send Email
-    elif path.endswith('/send-email') and method == 'POST':
-        return handle_send_email(event)
-    
-    else:
-        return create_response(404, {
-            'error': 'Not found',
-            'message': 'Invalid endpoint or method',
-            'path': path,
-            'method': method
-        })
+    return route_handler(event)
 
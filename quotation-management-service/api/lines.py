@@ -14,8 +14,8 @@ These individual line item endpoints remain available for:
 - Backward compatibility
 """
 
-import os
 import logging
+from decimal import Decimal, InvalidOperation
 from typing import Dict, Any
 
 from api.utils import get_path_parameter, get_request_body, create_response
@@ -30,7 +30,10 @@ from services.line_service import (
 )
 
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+# Allowed global_margin_pct range
+MIN_GLOBAL_MARGIN = Decimal('0')
+MAX_GLOBAL_MARGIN = Decimal('1')
 
 
 def handle_add_line(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -167,11 +170,10 @@ def handle_apply_margin(event: Dict[str, Any]) -> Dict[str, Any]:
             return create_response(400, {'error': 'Missing global_margin_pct field'})
         
         try:
-            from decimal import Decimal
             global_margin_pct = Decimal(str(body['global_margin_pct']))
-            if global_margin_pct < 0 or global_margin_pct > 1:
+            if not MIN_GLOBAL_MARGIN <= global_margin_pct <= MAX_GLOBAL_MARGIN:
                 return create_response(400, {'error': 'global_margin_pct must be between 0 and 1'})
-        except (ValueError, TypeError) as e:
+        except (ValueError, TypeError, InvalidOperation) as e:
             return create_response(400, {'error': 'global_margin_pct must be a number'})
         
         # Apply global margin
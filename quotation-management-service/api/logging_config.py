@@ -0,0 +1,26 @@
+"""
+Logging configuration for the Lambda entry point.
+"""
+
+import os
+import logging
+
+# Library loggers kept at WARNING so LOG_LEVEL=INFO/DEBUG only affects service logs
+THIRD_PARTY_LOGGERS = ('boto3', 'botocore', 's3transfer', 'urllib3')
+
+
+def configure_logging() -> None:
+    """
+    Apply LOG_LEVEL (default INFO) to the root logger once per container.
+
+    Module loggers are left at NOTSET and inherit this level, so the
+    environment variable is read here instead of in every module.
+    Unknown level names fall back to INFO.
+    """
+    level = logging.getLevelName(os.getenv('LOG_LEVEL', 'INFO').upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    logging.getLogger().setLevel(level)
+    for name in THIRD_PARTY_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
@@ -2,7 +2,6 @@
 Quotation CRUD endpoint handlers.
 """
 
-import os
 import logging
 from typing import Dict, Any
 
@@ -18,7 +17,6 @@ from services.quotation_service import (
 )
 
 logger = logging.getLogger('[QUOTATIONS]')
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 
 def handle_create_quotation(event: Dict[str, Any]) -> Dict[str, Any]:
@@ -4,9 +4,11 @@ Shared utility functions for the Quotation Management API.
 
 import os
 import json
+import base64
+import hmac
 import logging
 from typing import Dict, Any, Optional
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, unquote_plus
 import sys
 
 # Add parent and shared directories to path
@@ -20,7 +22,66 @@ for path in {SERVICE_ROOT, REPO_ROOT, SHARED_DIR}:
 
 # Configure logging
 logger = logging.getLogger('[UTILS]')
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
+
+# API key for the local fallback check (read once per container)
+QUOTATION_API_KEY = os.getenv('QUOTATION_API_KEY')
+
+# Prefer orjson (C extension) for request/response JSON; fall back to json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Prefer pybase64 (SIMD libbase64) for encoding export files; fall back to base64
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+def json_dumps(obj: Any) -> str:
+    """
+    Serialize a response body to a JSON string.
+    
+    Values JSON cannot represent (e.g. DynamoDB Decimals) are converted with str().
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(obj, default=str)
+
+
+def json_loads(data: Any) -> Any:
+    """Parse a JSON request body (raises json.JSONDecodeError on bad input)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def b64encode_ascii(data: Any) -> str:
+    """Base64-encode bytes or a buffer (e.g. BytesIO.getbuffer()) to a str."""
+    if pybase64 is not None:
+        return pybase64.b64encode(data).decode('ascii')
+    return base64.b64encode(data).decode('ascii')
+
+
+def _parse_query_string(raw: str) -> Dict[str, Any]:
+    """
+    Parse a raw query string in a single pass.
+    
+    Matches parse_qs (blank values are dropped) with single values unwrapped;
+    a repeated key falls back to parse_qs so multi-value params stay lists.
+    """
+    params = {}
+    for pair in raw.split('&'):
+        key, sep, value = pair.partition('=')
+        if not sep or not value:
+            continue
+        key = unquote_plus(key)
+        if key in params:
+            parsed = parse_qs(raw)
+            return {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
+        params[key] = unquote_plus(value)
+    return params
 
 
 def get_query_params(event: Dict[str, Any]) -> Dict[str, str]:
@@ -41,8 +102,7 @@ def get_query_params(event: Dict[str, Any]) -> Dict[str, str]:
     
     # Handle URL-encoded parameters
     elif 'rawQueryString' in event:
-        parsed = parse_qs(event['rawQueryString'])
-        params = {k: v[0] if len(v) == 1 else v for k, v in parsed.items()}
+        params = _parse_query_string(event['rawQueryString'])
     
     logger.info(f"[GET-QUERY-PARAMS] Query parameters: {params}")
     return params
@@ -77,49 +137,62 @@ def get_request_body(event: Dict[str, Any]) -> Dict[str, Any]:
     
     if isinstance(body, str):
         try:
-            return json.loads(body)
+            return json_loads(body)
         except json.JSONDecodeError:
             return {}
     
     return body if isinstance(body, dict) else {}
 
 
+# Headers sent with every response (JSON content type, CORS, security)
+DEFAULT_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Api-Key',
+    # Security headers
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Referrer-Policy': 'strict-origin-when-cross-origin',
+}
+
+
 def create_response(
     status_code: int,
     body: Any,
-    headers: Optional[Dict[str, str]] = None
+    headers: Optional[Dict[str, str]] = None,
+    binary: bool = False
 ) -> Dict[str, Any]:
     """
     Create standardized API Gateway response with security headers.
     
     Args:
         status_code: HTTP status code
-        body: Response body
-        headers: Optional additional headers
+        body: Response body (bytes-like, or an already base64-encoded str, when binary=True)
+        headers: Optional additional headers (set Content-Type for binary bodies)
+        binary: Return body as a binary payload (isBase64Encoded); API Gateway
+            decodes it and sends the raw bytes to the client
         
     Returns:
         API Gateway response
     """
-    default_headers = {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Methods': 'GET, POST, PUT, PATCH, DELETE, OPTIONS',
-        'Access-Control-Allow-Headers': 'Content-Type, Authorization, X-Api-Key',
-        # Security headers
-        'X-Content-Type-Options': 'nosniff',
-        'X-Frame-Options': 'DENY',
-        'X-XSS-Protection': '1; mode=block',
-        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
-        'Referrer-Policy': 'strict-origin-when-cross-origin',
-    }
+    # Copy so per-response headers never leak into the shared defaults
+    default_headers = {**DEFAULT_HEADERS, **headers} if headers else DEFAULT_HEADERS.copy()
     
-    if headers:
-        default_headers.update(headers)
+    if binary:
+        return {
+            'statusCode': status_code,
+            'headers': default_headers,
+            'body': body if isinstance(body, str) else b64encode_ascii(body),
+            'isBase64Encoded': True
+        }
     
     return {
         'statusCode': status_code,
         'headers': default_headers,
-        'body': json.dumps(body, default=str) if not isinstance(body, str) else body
+        'body': json_dumps(body) if not isinstance(body, str) else body
     }
 
 
@@ -135,25 +208,24 @@ def verify_auth(event: Dict[str, Any]) -> bool:
         True if authenticated, False otherwise
     """
     headers = event.get('headers', {}) or {}
+    # Header names are case-insensitive; index them by lowercase name once
+    lower_headers = {k.lower(): v for k, v in headers.items()}
     
-    # Log header keys for debugging (case-insensitive check)
-    header_keys_lower = [k.lower() for k in headers.keys()]
-    logger.info(f"[AUTH] Available header keys (lowercase): {header_keys_lower}")
+    # Log header keys for debugging
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("[AUTH] Available header keys (lowercase): %s", list(lower_headers))
     
     # Check for Cognito token first (Authorization: Bearer <token>)
-    auth_header = None
-    for key in headers:
-        if key.lower() == 'authorization':
-            auth_header = headers[key]
-            break
+    auth_header = lower_headers.get('authorization')
     
     has_cognito_token = False
     if auth_header and isinstance(auth_header, str) and auth_header.startswith('Bearer '):
         token = auth_header[7:].strip()
         if token:
-            # Check if it's a valid JWT structure (3 parts separated by dots)
-            parts = token.split('.')
-            if len(parts) == 3:  # JWT has 3 parts
+            # Check if it's a valid JWT structure (3 non-empty parts separated by
+            # dots), without splitting the token
+            if (token.count('.') == 2 and '..' not in token
+                    and not token.startswith('.') and not token.endswith('.')):
                 has_cognito_token = True
                 logger.info("[AUTH] Request authenticated with Cognito Bearer token")
                 # Note: Actual JWT verification should be done by API Gateway authorizer
@@ -168,15 +240,10 @@ def verify_auth(event: Dict[str, Any]) -> bool:
             logger.info("[AUTH] Using shared API key authentication module")
             
             # Try to get API key from headers for logging (without logging the value)
-            api_key_headers = ['x-api-key', 'X-Api-Key', 'X-API-Key']
-            api_key_found = None
-            for header_key in api_key_headers:
-                if header_key in headers:
-                    api_key_found = header_key
-                    break
+            api_key = lower_headers.get('x-api-key')
             
-            if api_key_found:
-                logger.info(f"[AUTH] Found API key in header: {api_key_found} (length: {len(headers[api_key_found])})")
+            if api_key:
+                logger.info(f"[AUTH] Found API key in header: x-api-key (length: {len(api_key)})")
             else:
                 logger.warning("[AUTH] No API key found in headers")
             
@@ -193,8 +260,7 @@ def verify_auth(event: Dict[str, Any]) -> bool:
             logger.warning(f"[AUTH] Shared auth module not available: {e}, using local implementation")
             logger.warning("[AUTH] This should not happen in production - check shared module path")
             
-            # Handle case-insensitive headers
-            api_key = headers.get('x-api-key') or headers.get('X-Api-Key') or headers.get('X-API-Key')
+            api_key = lower_headers.get('x-api-key')
             
             if not api_key:
                 logger.warning("[AUTH] No API key found in headers (fallback check)")
@@ -202,7 +268,7 @@ def verify_auth(event: Dict[str, Any]) -> bool:
             
             logger.info(f"[AUTH] API key found in headers (length: {len(api_key)})")
             
-            expected_key = os.getenv('QUOTATION_API_KEY')
+            expected_key = QUOTATION_API_KEY
             
             if not expected_key:
                 logger.error("[AUTH] QUOTATION_API_KEY not set in environment variables")
@@ -211,7 +277,7 @@ def verify_auth(event: Dict[str, Any]) -> bool:
             
             logger.info(f"[AUTH] Expected API key configured (length: {len(expected_key)})")
             
-            is_match = api_key == expected_key
+            is_match = hmac.compare_digest(api_key.encode(), expected_key.encode())
             if not is_match:
                 logger.warning("[AUTH] API key mismatch - keys have different lengths or values")
             
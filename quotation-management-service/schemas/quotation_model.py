@@ -2,10 +2,40 @@
 Data models for quotations and line items.
 """
 
+import os
+import uuid
 from typing import Dict, Any, List, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+
+# Default VAT rate for new quotations (read once per container)
+DEFAULT_VAT_RATE = Decimal(os.getenv('VAT_RATE', '0.18'))
+
+_ZERO = Decimal('0.0')
+_ONE = Decimal('1.0')
+
+
+def _to_decimal(value: Any, default: Optional[Decimal] = None) -> Optional[Decimal]:
+    """
+    Convert a numeric value to Decimal, returning `default` when it is missing
+    or not a finite number (DynamoDB cannot store NaN or Infinity).
+    
+    Decimals are returned as-is and ints converted directly; anything else goes
+    through str() so floats keep their shortest decimal form.
+    """
+    if value is None:
+        return default
+    if isinstance(value, Decimal):
+        result = value
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return Decimal(value)
+    else:
+        try:
+            result = Decimal(str(value))
+        except (InvalidOperation, ValueError, TypeError):
+            return default
+    return result if result.is_finite() else default
 
 
 class QuotationStatus(str, Enum):
@@ -35,6 +65,12 @@ class Currency(str, Enum):
     EUR = "EUR"
 
 
+# Valid enum values, for O(1) validation of request strings
+QUOTATION_STATUS_VALUES = frozenset(status.value for status in QuotationStatus)
+LINE_ITEM_SOURCE_VALUES = frozenset(source.value for source in LineItemSource)
+CURRENCY_VALUES = frozenset(currency.value for currency in Currency)
+
+
 def create_line_item(
     ordering_number: Optional[str] = None,
     product_name: str = "",
@@ -73,45 +109,23 @@ def create_line_item(
     Returns:
         Line item dictionary
     """
-    import uuid
-    from datetime import datetime
-    
-    now = datetime.utcnow().isoformat() + "Z"
+    now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
     
-    # Handle base_price - None indicates price not found
-    base_price_value = None
-    if base_price is not None:
-        try:
-            base_price_value = Decimal(str(base_price))
-        except (ValueError, TypeError) as e:
-            # Invalid base_price, set to None
-            base_price_value = None
+    # Handle base_price - None indicates price not found (or invalid)
+    base_price_value = _to_decimal(base_price)
     
-    # Validate and convert quantity
-    try:
-        quantity_decimal = Decimal(str(quantity))
-        if quantity_decimal <= 0:
-            quantity_decimal = Decimal('1.0')
-    except (ValueError, TypeError):
-        quantity_decimal = Decimal('1.0')
+    # Validate and convert quantity (must be > 0)
+    quantity_decimal = _to_decimal(quantity, _ONE)
+    if quantity_decimal <= 0:
+        quantity_decimal = _ONE
     
-    # Validate and convert margin_pct
-    margin_pct_decimal = None
-    if margin_pct is not None:
-        try:
-            margin_pct_decimal = Decimal(str(margin_pct))
-            if margin_pct_decimal < 0 or margin_pct_decimal > 1:
-                margin_pct_decimal = None
-        except (ValueError, TypeError):
-            margin_pct_decimal = None
+    # Validate and convert margin_pct (0..1)
+    margin_pct_decimal = _to_decimal(margin_pct)
+    if margin_pct_decimal is not None and not 0 <= margin_pct_decimal <= 1:
+        margin_pct_decimal = None
     
     # Validate and convert final_price
-    final_price_decimal = None
-    if final_price is not None:
-        try:
-            final_price_decimal = Decimal(str(final_price))
-        except (ValueError, TypeError):
-            final_price_decimal = None
+    final_price_decimal = _to_decimal(final_price)
     
     return {
         "line_id": line_id or str(uuid.uuid4()),
@@ -159,22 +173,19 @@ def create_quotation(
     Returns:
         Quotation dictionary
     """
-    import uuid
-    import os
-    from datetime import datetime
-    
-    now = datetime.utcnow().isoformat() + "Z"
+    created = datetime.now(timezone.utc)
+    now = created.isoformat().replace('+00:00', 'Z')
     
     if not name:
-        name = f"Quotation - {datetime.utcnow().strftime('%Y-%m-%d')}"
+        name = f"Quotation - {created.strftime('%Y-%m-%d')}"
     
     if vat_rate is None:
-        vat_rate = Decimal(os.getenv('VAT_RATE', '0.18'))
+        vat_rate = DEFAULT_VAT_RATE
     else:
         vat_rate = Decimal(str(vat_rate))
     
     if global_margin_pct is None:
-        global_margin_pct = Decimal('0.0')
+        global_margin_pct = _ZERO
     else:
         global_margin_pct = Decimal(str(global_margin_pct))
     
@@ -191,9 +202,9 @@ def create_quotation(
         "notes": notes or "",
         "lines": [],
         "totals": {
-            "subtotal": Decimal('0.0'),
-            "vat_total": Decimal('0.0'),
-            "total": Decimal('0.0')
+            "subtotal": _ZERO,
+            "vat_total": _ZERO,
+            "total": _ZERO
         },
         "exports": {
             "last_exported_at": None
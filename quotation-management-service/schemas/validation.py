@@ -3,34 +3,23 @@ Input validation for quotation management API.
 """
 
 from typing import Dict, Any, Optional, List
-from .quotation_model import QuotationStatus, Currency, LineItemSource
+from .quotation_model import QUOTATION_STATUS_VALUES, CURRENCY_VALUES, LINE_ITEM_SOURCE_VALUES
 
 
 def validate_quotation_status(status: str) -> bool:
     """Validate quotation status."""
-    try:
-        QuotationStatus(status)
-        return True
-    except ValueError:
-        return False
+    # isinstance guard: unhashable JSON values (lists, dicts) are invalid, not errors
+    return isinstance(status, str) and status in QUOTATION_STATUS_VALUES
 
 
 def validate_currency(currency: str) -> bool:
     """Validate currency code."""
-    try:
-        Currency(currency)
-        return True
-    except ValueError:
-        return False
+    return isinstance(currency, str) and currency in CURRENCY_VALUES
 
 
 def validate_line_item_source(source: str) -> bool:
     """Validate line item source."""
-    try:
-        LineItemSource(source)
-        return True
-    except ValueError:
-        return False
+    return isinstance(source, str) and source in LINE_ITEM_SOURCE_VALUES
 
 
 def validate_create_quotation(data: Dict[str, Any]) -> tuple[bool, Optional[str]]:
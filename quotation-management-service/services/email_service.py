@@ -12,7 +12,6 @@ from io import BytesIO
 
 # Configure logger first
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 # Add shared directory to path
 SERVICE_ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -2,7 +2,6 @@
 Export service for generating Excel files.
 """
 
-import os
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
@@ -13,8 +12,6 @@ from openpyxl.styles import Font, Alignment
 from services.quotation_service import get_quotation, get_quotations_table
 
 logger = logging.getLogger(__name__)
-log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-logger.setLevel(getattr(logging, log_level, logging.INFO))
 
 
 def generate_stock_check_excel(quotation: Dict[str, Any]) -> BytesIO:
@@ -148,17 +145,19 @@ def generate_priority_import_excel(quotation: Dict[str, Any]) -> BytesIO:
 # Removed S3 upload functions - exports are returned directly for download
 
 
-def export_stock_check(quotation_id: str) -> Optional[BytesIO]:
+def export_stock_check(quotation_id: str, quotation: Optional[Dict[str, Any]] = None) -> Optional[BytesIO]:
     """
     Generate stock check Excel export and return as BytesIO for direct download.
     
     Args:
         quotation_id: Quotation ID
+        quotation: Already-fetched quotation (skips reading it again)
     
     Returns:
         BytesIO object containing Excel file, or None on error
     """
-    quotation = get_quotation(quotation_id)
+    if quotation is None:
+        quotation = get_quotation(quotation_id)
     if not quotation:
         return None
     
@@ -187,17 +186,19 @@ def export_stock_check(quotation_id: str) -> Optional[BytesIO]:
     return excel_data
 
 
-def export_priority_import(quotation_id: str) -> Optional[BytesIO]:
+def export_priority_import(quotation_id: str, quotation: Optional[Dict[str, Any]] = None) -> Optional[BytesIO]:
     """
     Generate priority import Excel export and return as BytesIO for direct download.
     
     Args:
         quotation_id: Quotation ID
+        quotation: Already-fetched quotation (skips reading it again)
     
     Returns:
         BytesIO object containing Excel file, or None on error
     """
-    quotation = get_quotation(quotation_id)
+    if quotation is None:
+        quotation = get_quotation(quotation_id)
     if not quotation:
         return None
     
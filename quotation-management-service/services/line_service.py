@@ -2,7 +2,6 @@
 Line item business logic service.
 """
 
-import os
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime
@@ -24,7 +23,6 @@ from services.price_service import (
 )
 
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 
 def add_line_item(quotation_id: str, line_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -25,7 +25,6 @@ except ImportError:
     fetch_product = None
 
 logger = logging.getLogger(__name__)
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 
 def calculate_line_final_price(
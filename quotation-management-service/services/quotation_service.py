@@ -14,7 +14,6 @@ from schemas.quotation_model import create_quotation, QuotationStatus
 from services.price_service import calculate_quotation_totals
 
 logger = logging.getLogger('[QUOTATION-SERVICE]')
-logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
 QUOTATIONS_TABLE = os.getenv('QUOTATIONS_TABLE', 'quotations')
 
@@ -8,6 +8,7 @@ Supports:
 """
 
 import os
+import hmac
 import json
 import logging
 import boto3
@@ -17,7 +18,8 @@ from functools import lru_cache
 logger = logging.getLogger(__name__)
 logger.setLevel(os.getenv('LOG_LEVEL', 'INFO'))
 
-# Cache for secrets (to avoid fetching on every invocation)
+# Cache for secrets (to avoid fetching on every invocation); secrets that do
+# not exist are cached as None so the env var fallback skips the AWS call
 _secrets_cache = {}
 
 
@@ -48,6 +50,9 @@ def get_secret_from_secrets_manager(secret_name: str) -> Optional[str]:
         # Only log warning if not a ResourceNotFoundException (expected in local dev)
         if 'ResourceNotFoundException' not in str(e):
             logger.warning(f"Could not retrieve secret {secret_name} from Secrets Manager: {e}")
+        else:
+            # Missing secret: remember it; other errors (throttling, network) are retried
+            _secrets_cache[secret_name] = None
         # In local development, this is expected - will fall back to environment variables
         return None
 
@@ -255,14 +260,8 @@ def constant_time_compare(a: str, b: str) -> bool:
     Returns:
         True if strings are equal, False otherwise
     """
-    if len(a) != len(b):
-        return False
-    
-    result = 0
-    for x, y in zip(a.encode(), b.encode()):
-        result |= x ^ y
-    
-    return result == 0
+    # compare_digest only accepts ASCII str, so compare the UTF-8 bytes
+    return hmac.compare_digest(a.encode(), b.encode())
 
 
 def create_unauthorized_response(message: str = "Unauthorized") -> Dict[str, Any]:
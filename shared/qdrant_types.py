@@ -2,7 +2,7 @@
 Shared Qdrant payload types.
 """
 
-from typing import TypedDict
+from typing import List, TypedDict
 
 
 class ProductMetadata(TypedDict, total=False):
@@ -11,4 +11,8 @@ class ProductMetadata(TypedDict, total=False):
     orderingNumber: str
     productCategory: str
     searchText: str
+    # Hash of (embedding model, searchText) the stored vector was computed from
+    searchTextHash: str
+    # Lowercased orderingNumber prefixes (KEYWORD index) for autocomplete
+    prefixes: List[str]
 
@@ -1,7 +1,7 @@
 import os
 import json
 import base64
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterator, List
 from openai import OpenAI
 import boto3
 from urllib.parse import urlparse
@@ -12,7 +12,7 @@ class OpenAIClient:
     A modest and mild OpenAI client for chat completions and file-based queries.
     """
     
-    def __init__(self, api_key: Optional[str] = None, aws_access_key_id: Optional[str] = None, aws_secret_access_key: Optional[str] = None, aws_region: str = "us-east-1"):
+    def __init__(self, api_key: Optional[str] = None, aws_access_key_id: Optional[str] = None, aws_secret_access_key: Optional[str] = None, aws_region: str = "us-east-1", http_client: Optional[Any] = None):
         """
         Initialize the OpenAI client.
         
@@ -21,12 +21,13 @@ class OpenAIClient:
             aws_access_key_id: AWS access key ID for S3 access. If not provided, will use default AWS credentials.
             aws_secret_access_key: AWS secret access key for S3 access. If not provided, will use default AWS credentials.
             aws_region: AWS region for S3 access (default: us-east-1).
+            http_client: Optional httpx.Client for the OpenAI SDK (e.g. with custom keep-alive limits).
         """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Provide it directly or set OPENAI_API_KEY environment variable.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.client = OpenAI(api_key=self.api_key, http_client=http_client)
         
         # Initialize S3 client
         try:
@@ -72,13 +73,39 @@ class OpenAIClient:
         except Exception as e:
             raise Exception(f"Chat completion failed: {str(e)}")
     
-    def chat_completion_json(self, messages: List[Dict[str, str]], model: str = "gpt-4-turbo", **kwargs) -> Dict[str, Any]:
+    def chat_completion_stream(self, messages: List[Dict[str, str]], model: str = "gpt-4-turbo", response_format: Optional[Dict[str, Any]] = None, **kwargs) -> Iterator[str]:
+        """
+        Send a streaming chat completion request and yield content fragments as they arrive.
+        
+        Closing the generator early closes the underlying HTTP response, so the
+        caller can stop reading once it has what it needs.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            model: Model to use for completion (default: gpt-4-turbo)
+            response_format: Response format specification (e.g., {"type": "json_object"})
+            **kwargs: Additional parameters to pass to the completion request
+            
+        Yields:
+            Text fragments of the response content
+        """
+        stream = self.chat_completion(messages=messages, model=model, response_format=response_format, stream=True, **kwargs)
+        try:
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+    
+    def chat_completion_json(self, messages: List[Dict[str, str]], model: str = "gpt-4-turbo", response_format: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
         """
         Send a chat completion request with structured JSON output.
         
         Args:
             messages: List of message dictionaries with 'role' and 'content' keys
             model: Model to use for completion (default: gpt-4-turbo)
+            response_format: Response format specification, e.g. a {"type": "json_schema", ...}
+                structured-output schema (default: {"type": "json_object"})
             **kwargs: Additional parameters to pass to the completion request
             
         Returns:
@@ -91,7 +118,7 @@ class OpenAIClient:
         response = self.chat_completion(
             messages=messages,
             model=model,
-            response_format={"type": "json_object"},
+            response_format=response_format or {"type": "json_object"},
             **kwargs
         )
         